@@ -22,3 +22,6 @@ ADB_PORT = 5555
 
 # Screenshot settings
 SCREENSHOT_REMOTE_PATH = "/sdcard/screenshot.png"
+
+# MCP server settings
+MCP_CONFIG_PATH = BASE_DIR / "android-mcp-server" / "config.yaml"
@@ -0,0 +1,314 @@
+"""
+Persistent ADB shell session shared by the dump utilities.
+
+Spawning a new `adb` client for every device command pays the process start,
+transport setup and shell startup cost each time. This module keeps `adb shell`
+processes open and feeds them commands one after another.
+"""
+import os
+import queue
+import shlex
+import subprocess
+import threading
+import uuid
+from typing import Dict, List, Optional, Tuple, Union
+
+# Upper bound on the size of one batched script, well under the device's ARG_MAX
+MAX_BATCH_SCRIPT = 64 * 1024
+
+# Upper bound on an `adb exec-out` command line. The adb client sends it to
+# the server as an "exec:<command>" service string with a 4-hex-digit length,
+# so it must stay well under 0xFFFF bytes
+MAX_EXEC_COMMAND = 32 * 1024
+
+# Default cap on concurrent adb sessions; past this adbd and the USB link
+# stop getting faster and start contending
+MAX_ADB_CONCURRENCY = 8
+
+
+def adb_concurrency() -> int:
+    """
+    Number of adb sessions to run in parallel.
+
+    Uses the UNRAYNEO_ADB_CONCURRENCY environment variable when set, otherwise
+    the number of usable CPUs capped at MAX_ADB_CONCURRENCY.
+
+    Returns:
+        Number of concurrent adb sessions (at least 1)
+    """
+    override = os.environ.get("UNRAYNEO_ADB_CONCURRENCY")
+    if override:
+        try:
+            return max(1, int(override))
+        except ValueError:
+            print(f"Ignoring invalid UNRAYNEO_ADB_CONCURRENCY: {override}")
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    return max(1, min(cpus, MAX_ADB_CONCURRENCY))
+
+
+def start_adb_server() -> None:
+    """
+    Start the adb server and wait for the device before any parallel work.
+
+    Otherwise the first burst of concurrent adb clients races to start the
+    server.
+    """
+    subprocess.run(["adb", "start-server"], capture_output=True)
+    subprocess.run(["adb", "wait-for-device"], capture_output=True)
+
+
+class _ShellProcess:
+    """A single `adb shell` process that runs one command at a time."""
+
+    def __init__(self, marker: bytes):
+        self._marker = marker
+        self._stderr_lines: "queue.Queue[Optional[bytes]]" = queue.Queue()
+        self._proc = subprocess.Popen(
+            ["adb", "shell"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        threading.Thread(
+            target=self._drain_stderr,
+            args=(self._proc.stderr, self._stderr_lines),
+            daemon=True,
+        ).start()
+
+    @property
+    def alive(self) -> bool:
+        return self._proc.poll() is None
+
+    def close(self) -> None:
+        """Terminate the `adb shell` process."""
+        try:
+            self._proc.stdin.write(b"exit\n")
+            self._proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+            self._proc.wait()
+
+    def run(self, command: str) -> Tuple[int, bytes, bytes]:
+        """Run a command and return the exit code and raw stdout/stderr."""
+        marker = self._marker.decode()
+        script = (
+            f"sh -c {shlex.quote(command)} </dev/null; "
+            f"echo {marker}$?; echo {marker} >&2\n"
+        )
+        try:
+            self._proc.stdin.write(script.encode())
+            self._proc.stdin.flush()
+        except OSError:
+            return 255, b"", b"adb shell session closed"
+
+        returncode, stdout = self._read_stdout()
+        stderr = self._read_stderr()
+        if returncode is None:
+            # The session died mid-command
+            returncode = 255
+        return returncode, stdout, stderr
+
+    def _read_stdout(self) -> Tuple[Optional[int], bytes]:
+        """Read stdout up to the sentinel marker and parse the exit code."""
+        chunks = []
+        for line in iter(self._proc.stdout.readline, b""):
+            index = line.find(self._marker)
+            if index == -1:
+                chunks.append(line)
+                continue
+            chunks.append(line[:index])
+            try:
+                returncode = int(line[index + len(self._marker):].strip())
+            except ValueError:
+                returncode = 255
+            return returncode, b"".join(chunks)
+        return None, b"".join(chunks)
+
+    def _read_stderr(self) -> bytes:
+        """Collect stderr lines up to the sentinel marker."""
+        chunks = []
+        while True:
+            line = self._stderr_lines.get()
+            if line is None:
+                break
+            index = line.find(self._marker)
+            if index != -1:
+                chunks.append(line[:index])
+                break
+            chunks.append(line)
+        return b"".join(chunks)
+
+    @staticmethod
+    def _drain_stderr(pipe, lines: "queue.Queue[Optional[bytes]]") -> None:
+        """Forward stderr lines to a queue so a full pipe never blocks the device."""
+        for line in iter(pipe.readline, b""):
+            lines.put(line)
+        lines.put(None)
+
+
+class AdbShell:
+    """
+    Long-lived `adb shell` sessions that run commands without spawning adb per call.
+
+    Every command is followed by a sentinel marker carrying its exit code, so the
+    output of each command can be read back from the same process. Up to
+    `max_sessions` processes are opened on demand, which lets several threads
+    run device commands concurrently.
+
+    Usage:
+        with AdbShell() as shell:
+            returncode, stdout, stderr = shell.run("getprop ro.product.model")
+    """
+
+    def __init__(self, max_sessions: int = 1):
+        self._marker = f"__UR_END_{uuid.uuid4().hex}__".encode()
+        self._max_sessions = max(1, max_sessions)
+        self._lock = threading.Lock()
+        self._idle: "queue.Queue[_ShellProcess]" = queue.Queue()
+        self._sessions: List[_ShellProcess] = []
+
+    def __enter__(self) -> "AdbShell":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Terminate all `adb shell` processes."""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+            self._idle = queue.Queue()
+        for session in sessions:
+            session.close()
+
+    def run(
+        self,
+        command: str,
+        binary: bool = False,
+    ) -> Tuple[int, Union[str, bytes], Union[str, bytes]]:
+        """
+        Run a command in one of the persistent shells.
+
+        The command is executed by a fresh `sh -c` on the device so that syntax
+        errors or reads from stdin cannot break the session.
+
+        Args:
+            command: The shell command line to run on the device.
+            binary: Return stdout/stderr as raw bytes instead of decoding them.
+
+        Returns:
+            Tuple of (exit_code, stdout, stderr)
+        """
+        session = self._acquire()
+        try:
+            returncode, stdout, stderr = session.run(command)
+        finally:
+            self._release(session)
+        if binary:
+            return returncode, stdout, stderr
+        return returncode, stdout.decode("utf-8", "replace"), stderr.decode("utf-8", "replace")
+
+    def run_batch(
+        self,
+        commands: Dict[str, str],
+        binary: bool = False,
+    ) -> Dict[str, Tuple[int, Union[str, bytes]]]:
+        """
+        Run many commands with as few round-trips as possible.
+
+        The commands are joined into scripts of at most MAX_BATCH_SCRIPT bytes,
+        with each command's output bracketed by markers carrying its exit code.
+        Each command runs in its own `sh -c`, so one failing command does not
+        affect the rest. Stderr of the batched commands is discarded.
+
+        Args:
+            commands: Mapping of caller-chosen keys to shell command lines.
+            binary: Return each stdout as raw bytes instead of decoding it.
+
+        Returns:
+            Dictionary mapping each key to (exit_code, stdout)
+        """
+        marker = f"__UR_{uuid.uuid4().hex}"
+        keys = list(commands)
+        results = {}
+
+        start = 0
+        while start < len(keys):
+            parts = []
+            size = 0
+            end = start
+            while end < len(keys):
+                part = (
+                    f"echo {marker}_BEGIN_{end}; "
+                    f"sh -c {shlex.quote(commands[keys[end]])} </dev/null; "
+                    f"printf '\\n{marker}_END_{end}_%s\\n' $?"
+                )
+                if parts and size + len(part) > MAX_BATCH_SCRIPT:
+                    break
+                parts.append(part)
+                size += len(part) + 1
+                end += 1
+
+            _, output, _ = self.run("\n".join(parts), binary=True)
+            for index in range(start, end):
+                returncode, stdout = self._parse_batch_output(output, marker, index)
+                results[keys[index]] = (returncode, stdout if binary else stdout.decode("utf-8", "replace"))
+            start = end
+
+        return results
+
+    @staticmethod
+    def _parse_batch_output(output: bytes, marker: str, index: int) -> Tuple[int, bytes]:
+        """Extract the output and exit code of one command from a batch."""
+        begin = f"{marker}_BEGIN_{index}\n".encode()
+        end = f"\n{marker}_END_{index}_".encode()
+        begin_at = output.find(begin)
+        if begin_at == -1:
+            return 255, b""
+        content_at = begin_at + len(begin)
+        end_at = output.find(end, content_at)
+        if end_at == -1:
+            return 255, output[content_at:]
+        rc_at = end_at + len(end)
+        rc_end = output.find(b"\n", rc_at)
+        try:
+            returncode = int(output[rc_at:rc_end if rc_end != -1 else None])
+        except ValueError:
+            returncode = 255
+        return returncode, output[content_at:end_at]
+
+    def _acquire(self) -> _ShellProcess:
+        """Take an idle session, opening a new one if the limit allows."""
+        with self._lock:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            if len(self._sessions) < self._max_sessions:
+                session = _ShellProcess(self._marker)
+                self._sessions.append(session)
+                return session
+            idle = self._idle
+        return idle.get()
+
+    def _release(self, session: _ShellProcess) -> None:
+        """Return a session to the idle queue, replacing it if it died."""
+        with self._lock:
+            if session not in self._sessions:
+                return
+            if not session.alive:
+                # Replace the dead session so waiting callers are not stranded
+                self._sessions.remove(session)
+                try:
+                    session = _ShellProcess(self._marker)
+                except OSError:
+                    return
+                self._sessions.append(session)
+            self._idle.put(session)
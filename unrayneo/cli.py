@@ -1,25 +1,50 @@
 """
 Command-line interface for UnRayNeo tools.
 """
-import argparse
 import subprocess
 import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Tuple
 from unrayneo.command_logger import log_command
 
-from unrayneo.screenshot import capture_screenshot
-from unrayneo.settings_utils import SettingsPage, open_settings, close_settings
-from unrayneo.wifi import (
-    list_wifi_networks, 
-    get_current_wifi_connection, 
-    update_mcp_config,
-    enable_wifi,
-    trigger_wifi_scan,
-    connect_to_wifi
-)
+# Command modules (and argparse) are imported inside each command so an entry
+# point only loads what it actually uses.
+
+
+def _maybe_help(description):
+    """
+    Print help and exit if requested, for commands that take no arguments.
+    
+    These commands skip building an argparse parser just to serve a lone
+    -h/--help. Any other arguments go through the full parser, so unknown
+    ones are still rejected.
+    """
+    args = sys.argv[1:]
+    if not args:
+        return
+    if args in (["-h"], ["--help"]):
+        prog = Path(sys.argv[0]).name
+        print(f"usage: {prog} [-h]\n\n{description}\n\noptions:\n  -h, --help  show this help message and exit")
+        sys.exit(0)
+    
+    import argparse
+    argparse.ArgumentParser(description=description).parse_args()
+
+
+@lru_cache(maxsize=None)
+def _settings_page_choices() -> Tuple[str, ...]:
+    """Return the lowercase SettingsPage names accepted on the command line."""
+    from unrayneo.settings_utils import SettingsPage
+    return tuple(page.name.lower() for page in SettingsPage)
 
 
 def take_screenshot_command():
     """Command to take a screenshot from the RanNeo X2 AR glasses."""
+    import argparse
+    from unrayneo.screenshot import capture_screenshot
+    
     parser = argparse.ArgumentParser(description="Capture a screenshot from RanNeo X2 AR glasses")
     parser.add_argument(
         "-o", "--output",
@@ -39,11 +64,14 @@ def take_screenshot_command():
 
 def open_android_settings_command():
     """Command to open Android settings on the RanNeo X2 AR glasses."""
+    import argparse
+    from unrayneo.settings_utils import SettingsPage, open_settings
+    
     parser = argparse.ArgumentParser(description="Open Android settings on RanNeo X2 AR glasses")
     parser.add_argument(
         "-p", "--page",
         type=str,
-        choices=[page.name.lower() for page in SettingsPage],
+        choices=_settings_page_choices(),
         default="main",
         help="Settings page to open (default: main)",
     )
@@ -64,10 +92,9 @@ def open_android_settings_command():
 
 def open_android_dev_settings_command():
     """Command to open Android Developer Options on the RanNeo X2 AR glasses."""
-    parser = argparse.ArgumentParser(description="Open Android Developer Options on RanNeo X2 AR glasses")
+    from unrayneo.settings_utils import SettingsPage, open_settings
     
-    # Parse args but don't use them - this is just for help text
-    parser.parse_args(sys.argv[1:])
+    _maybe_help("Open Android Developer Options on RanNeo X2 AR glasses")
     
     try:
         open_settings(SettingsPage.DEVELOPER_OPTIONS)
@@ -79,10 +106,9 @@ def open_android_dev_settings_command():
 
 def close_android_settings_command():
     """Command to close Android settings on the RanNeo X2 AR glasses."""
-    parser = argparse.ArgumentParser(description="Close Android settings on RanNeo X2 AR glasses")
+    from unrayneo.settings_utils import close_settings
     
-    # Parse args but don't use them - this is just for help text
-    parser.parse_args(sys.argv[1:])
+    _maybe_help("Close Android settings on RanNeo X2 AR glasses")
     
     try:
         close_settings()
@@ -94,10 +120,7 @@ def close_android_settings_command():
 
 def press_home_button_command():
     """Command to press home button on the RanNeo X2 AR glasses."""
-    parser = argparse.ArgumentParser(description="Press home button on RanNeo X2 AR glasses")
-    
-    # Parse args but don't use them - this is just for help text
-    parser.parse_args(sys.argv[1:])
+    _maybe_help("Press home button on RanNeo X2 AR glasses")
     
     try:
         subprocess.run(["adb", "shell", "input", "keyevent", "KEYCODE_HOME"])
@@ -109,6 +132,8 @@ def press_home_button_command():
 
 def list_wifis_command():
     """Command to list available WiFi networks on the RanNeo X2 AR glasses."""
+    import argparse
+    
     parser = argparse.ArgumentParser(description="List available WiFi networks on RanNeo X2 AR glasses")
     parser.add_argument(
         "--update-config",
@@ -128,44 +153,63 @@ def list_wifis_command():
     
     args = parser.parse_args(sys.argv[1:])
     
+    from unrayneo.adb_shell import AdbShell
+    from unrayneo.wifi import list_wifi_networks, get_current_wifi_connection
+    
     try:
-        # Enable WiFi if requested
-        if args.enable:
-            enable_wifi()
-        
-        # Trigger a WiFi scan if requested
-        if args.scan:
-            trigger_wifi_scan()
-        
-        # Get current connection first
-        current = get_current_wifi_connection()
-        if current:
-            print("\nCurrent WiFi Connection:")
-            print(f"  SSID: {current['ssid']}")
-            print(f"  BSSID: {current['bssid']}")
-            print(f"  IP: {current['ip']}")
+        # Every device query goes through one persistent adb shell
+        with AdbShell() as adb_shell:
+            # Enable WiFi if requested
+            if args.enable:
+                from unrayneo.wifi import enable_wifi
+                enable_wifi(adb_shell)
             
-            # Update MCP config if requested
-            if args.update_config:
-                update_mcp_config(current['ip'])
-        else:
-            print("\nNot currently connected to any WiFi network")
-        
-        # List available networks
-        networks = list_wifi_networks()
-        
-        if networks:
-            print("\nAvailable WiFi Networks:")
-            for i, network in enumerate(networks, 1):
-                # Only show networks with non-empty SSIDs
-                if network['ssid']:
-                    print(f"\n{i}. {network['ssid']}")
-                    print(f"   BSSID: {network['bssid']}")
-                    print(f"   Frequency: {network['frequency']} MHz")
-                    print(f"   Signal Strength: {network['rssi']}")
-                    print(f"   Security: {network['flags']}")
-        else:
-            print("\nNo WiFi networks found")
+            # Start a WiFi scan if requested and let it run while we query the connection
+            scan = None
+            if args.scan:
+                from unrayneo.wifi import start_wifi_scan
+                scan = start_wifi_scan()
+            
+            try:
+                # Get current connection first
+                current = get_current_wifi_connection(adb_shell)
+                if current:
+                    print("\nCurrent WiFi Connection:")
+                    print(f"  SSID: {current['ssid']}")
+                    print(f"  BSSID: {current['bssid']}")
+                    print(f"  IP: {current['ip']}")
+                    
+                    # Update MCP config if requested
+                    if args.update_config:
+                        from unrayneo.wifi import update_mcp_config
+                        update_mcp_config(current['ip'])
+                else:
+                    print("\nNot currently connected to any WiFi network")
+                
+                # List available networks, waiting for the scan to finish if one was started
+                if scan:
+                    from unrayneo.wifi import wait_for_wifi_scan
+                    networks = wait_for_wifi_scan(scan, adb_shell=adb_shell)
+                else:
+                    networks = list_wifi_networks(adb_shell)
+            finally:
+                # Reap the scan's adb client even if a query above failed
+                if scan:
+                    from unrayneo.wifi import stop_wifi_scan
+                    stop_wifi_scan(scan)
+            
+            if networks:
+                print("\nAvailable WiFi Networks:")
+                for i, network in enumerate(networks, 1):
+                    # Only show networks with non-empty SSIDs
+                    if network['ssid']:
+                        print(f"\n{i}. {network['ssid']}")
+                        print(f"   BSSID: {network['bssid']}")
+                        print(f"   Frequency: {network['frequency']} MHz")
+                        print(f"   Signal Strength: {network['rssi']}")
+                        print(f"   Security: {network['flags']}")
+            else:
+                print("\nNo WiFi networks found")
             
         return 0
     except Exception as e:
@@ -175,10 +219,7 @@ def list_wifis_command():
 
 def list_packages_command():
     """Command to list installed packages on the RanNeo X2 AR glasses."""
-    parser = argparse.ArgumentParser(description="List installed packages on RanNeo X2 AR glasses")
-    
-    # Parse args but don't use them - this is just for help text
-    parser.parse_args(sys.argv[1:])
+    _maybe_help("List installed packages on RanNeo X2 AR glasses")
     
     try:
         result = subprocess.run(["adb", "shell", "pm", "list", "packages"], 
@@ -203,26 +244,8 @@ def wrap_command():
 
 def connect_wifi_command():
     """Command to connect to a WiFi network on the RanNeo X2 AR glasses."""
-
-def launch_horizontal_firefox_command():
-    """Command to launch Firefox in horizontal mode on the RanNeo X2 AR glasses."""
-    parser = argparse.ArgumentParser(description="Launch Firefox in horizontal mode on RanNeo X2 AR glasses")
+    import argparse
     
-    # Parse args but don't use them - this is just for help text
-    parser.parse_args(sys.argv[1:])
-    
-    try:
-        subprocess.run([
-            "adb", "shell", "am", "start", "-n", 
-            "com.ffalcon.appcontainer/.MainActivityV4", 
-            "-a", "android.intent.action.VIEW", 
-            "-d", "appcontainer://launch?packageName=org.mozilla.firefox&className=org.mozilla.fenix.HomeActivity&sbsMode=true"
-        ])
-        return 0
-    except Exception as e:
-        print(f"Error: {e}", file=sys.stderr)
-        return 1
-
     parser = argparse.ArgumentParser(description="Connect to a WiFi network on RanNeo X2 AR glasses")
     parser.add_argument(
         "ssid",
@@ -247,36 +270,61 @@ def launch_horizontal_firefox_command():
     
     args = parser.parse_args(sys.argv[1:])
     
+    from unrayneo.adb_shell import AdbShell
+    from unrayneo.wifi import connect_to_wifi, get_current_wifi_connection
+    
     try:
-        # Enable WiFi if requested
-        if args.enable:
-            enable_wifi()
-        
-        print(f"Connecting to WiFi network: {args.ssid}")
-        success = connect_to_wifi(args.ssid, args.password)
-        
-        if success:
-            print(f"Successfully connected to {args.ssid}")
+        # Every device query goes through one persistent adb shell
+        with AdbShell() as adb_shell:
+            # Enable WiFi if requested
+            if args.enable:
+                from unrayneo.wifi import enable_wifi
+                enable_wifi(adb_shell)
             
-            # Wait a moment for the connection to stabilize
-            import time
-            time.sleep(2)
+            print(f"Connecting to WiFi network: {args.ssid}")
+            success = connect_to_wifi(args.ssid, args.password, adb_shell=adb_shell)
             
-            # Get the current connection details
-            current = get_current_wifi_connection()
-            if current:
-                print(f"IP address: {current['ip']}")
+            if success:
+                print(f"Successfully connected to {args.ssid}")
+                
+                # Poll until the connection has an IP address (up to ~4 seconds)
+                for _ in range(20):
+                    current = get_current_wifi_connection(adb_shell, max_age=0)
+                    if current and current.get('ip') and current['ip'] != 'Unknown':
+                        break
+                    time.sleep(0.2)
                 
-                # Update MCP config if requested
-                if args.update_config:
-                    update_mcp_config(current['ip'])
+                if current:
+                    print(f"IP address: {current['ip']}")
+                    
+                    # Update MCP config if requested
+                    if args.update_config:
+                        from unrayneo.wifi import update_mcp_config
+                        update_mcp_config(current['ip'])
+                else:
+                    print("Warning: Connected but couldn't get IP address")
             else:
-                print("Warning: Connected but couldn't get IP address")
-        else:
-            print(f"Failed to connect to {args.ssid}")
-            return 1
+                print(f"Failed to connect to {args.ssid}")
+                return 1
             
         return 0
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         return 1
+
+
+def launch_horizontal_firefox_command():
+    """Command to launch Firefox in horizontal mode on the RanNeo X2 AR glasses."""
+    _maybe_help("Launch Firefox in horizontal mode on RanNeo X2 AR glasses")
+    
+    try:
+        subprocess.run([
+            "adb", "shell", "am", "start", "-n", 
+            "com.ffalcon.appcontainer/.MainActivityV4", 
+            "-a", "android.intent.action.VIEW", 
+            "-d", "appcontainer://launch?packageName=org.mozilla.firefox&className=org.mozilla.fenix.HomeActivity&sbsMode=true"
+        ])
+        return 0
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
@@ -3,9 +3,40 @@ Centralized command logging functionality.
 """
 from datetime import datetime
 import hashlib
+import os
+import selectors
+import shlex
 import subprocess
-import threading
+import sys
+import time
 from pathlib import Path
+from typing import List, Optional
+
+# How often the log files are flushed while a command is running, so they
+# can be followed live without flushing on every read
+LOG_FLUSH_INTERVAL = 0.1
+
+# Characters that need a shell to interpret them
+_SHELL_METACHARACTERS = frozenset("|&;<>()$`*?[]{}~#\n")
+
+
+def _split_command(cmd: str) -> Optional[List[str]]:
+    """
+    Split a command into argv if it can be executed without a shell.
+    
+    Returns None for pipelines, redirections, globs, variable expansions and
+    leading environment assignments, which still go through /bin/sh.
+    """
+    if any(c in _SHELL_METACHARACTERS for c in cmd):
+        return None
+    try:
+        argv = shlex.split(cmd)
+    except ValueError:
+        return None
+    if not argv or "=" in argv[0]:
+        return None
+    return argv
+
 
 def log_command(cmd: str, prefix: str = "cmd") -> int:
     """
@@ -13,57 +44,94 @@ def log_command(cmd: str, prefix: str = "cmd") -> int:
     Returns command's exit code.
     """
     # Create log directory structure
-    today = datetime.now().strftime("%Y-%m-%d")
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    cmd_hash = hashlib.md5(cmd.encode()).hexdigest()[:8]
+    now = datetime.now()
+    today = now.strftime("%Y-%m-%d")
+    timestamp = now.strftime("%Y%m%d_%H%M%S")
+    cmd_hash = hashlib.blake2b(cmd.encode(), digest_size=4).hexdigest()
     log_dir = Path(f"secret/command-logs/{today}/{prefix}_{cmd_hash}_{timestamp}")
     log_dir.mkdir(parents=True, exist_ok=True)
     
     # Save command input
-    with open(log_dir/"command.txt", "w") as f:
-        f.write(cmd)
+    (log_dir/"command.txt").write_text(cmd, encoding="utf-8")
     
     # Run command while streaming output to both console and log files
     print(f"Running: {cmd}")
     
-    with open(log_dir/"stdout.txt", "w") as stdout_file, \
-         open(log_dir/"stderr.txt", "w") as stderr_file:
-        
-        process = subprocess.Popen(
-            cmd,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1
-        )
+    with open(log_dir/"stdout.txt", "wb") as stdout_file, \
+         open(log_dir/"stderr.txt", "wb") as stderr_file:
         
-        # Stream stdout/stderr to both console and files
-        def stream_output(pipe, file, prefix=""):
-            for line in pipe:
-                print(prefix + line, end='')
-                file.write(line)
-                file.flush()
+        # Exec simple commands directly to skip spawning /bin/sh
+        argv = _split_command(cmd)
+        try:
+            process = subprocess.Popen(
+                argv if argv else cmd,
+                shell=argv is None,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+        except FileNotFoundError:
+            # Shell builtins and unknown commands are left to the shell
+            process = subprocess.Popen(
+                cmd,
+                shell=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
         
-        # Start threads for streaming
-        stdout_thread = threading.Thread(
-            target=stream_output,
-            args=(process.stdout, stdout_file))
-        stderr_thread = threading.Thread(
-            target=stream_output,
-            args=(process.stderr, stderr_file, "ERR: "))
+        # Stream stdout/stderr to both console and files from a single loop,
+        # reading whole chunks instead of one line at a time
+        console = sys.stdout.buffer
+        sys.stdout.flush()
+        selector = selectors.DefaultSelector()
+        selector.register(process.stdout, selectors.EVENT_READ, [stdout_file, b"", True])
+        selector.register(process.stderr, selectors.EVENT_READ, [stderr_file, b"ERR: ", True])
+        last_flush = time.monotonic()
+        pending = False
         
-        stdout_thread.start()
-        stderr_thread.start()
+        while selector.get_map():
+            # Wake up for the next flush while written output is still buffered,
+            # so a command that goes quiet does not hold it back
+            timeout = None
+            if pending:
+                timeout = max(0, LOG_FLUSH_INTERVAL - (time.monotonic() - last_flush))
+            
+            for key, _ in selector.select(timeout):
+                chunk = os.read(key.fd, 65536)
+                if not chunk:
+                    selector.unregister(key.fileobj)
+                    continue
+                
+                file, line_prefix, at_line_start = key.data
+                file.write(chunk)
+                pending = True
+                
+                if line_prefix:
+                    # Keep the prefix at the start of every console line
+                    ends_with_newline = chunk.endswith(b"\n")
+                    if ends_with_newline:
+                        chunk = chunk[:-1]
+                    chunk = chunk.replace(b"\n", b"\n" + line_prefix)
+                    if at_line_start:
+                        chunk = line_prefix + chunk
+                    if ends_with_newline:
+                        chunk += b"\n"
+                    key.data[2] = ends_with_newline
+                console.write(chunk)
+            console.flush()
+            
+            now = time.monotonic()
+            if pending and now - last_flush >= LOG_FLUSH_INTERVAL:
+                stdout_file.flush()
+                stderr_file.flush()
+                last_flush = now
+                pending = False
+        selector.close()
         
         # Wait for process to complete
         returncode = process.wait()
-        stdout_thread.join()
-        stderr_thread.join()
     
     # Save return code
-    with open(log_dir/"returncode.txt", "w") as f:
-        f.write(str(returncode))
+    (log_dir/"returncode.txt").write_text(str(returncode), encoding="utf-8")
         
     print(f"\nCommand logged to: {log_dir}")
     return returncode
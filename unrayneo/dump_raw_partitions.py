@@ -5,43 +5,76 @@ This script attempts to dump raw partition images from the RanNeo X2 AR glasses.
 It identifies all block devices and attempts to read their raw contents using dd.
 All data is saved to the secret directory to protect potentially sensitive information.
 """
+import argparse
 import os
+import re
 import subprocess
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from datetime import datetime
 import shutil
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union
 
 # Import project settings
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 import settings
+from unrayneo.adb_shell import AdbShell, start_adb_server
 
 # Create timestamp for the dump directory
 TIMESTAMP = datetime.now().strftime("%Y%m%d_%H%M%S")
 DUMP_DIR = settings.SECRET_DIR / f"raw_partition_dump_{TIMESTAMP}"
 
+# Maximum number of partitions dumped in parallel (stays under typical adbd limits)
+MAX_WORKERS = 4
+
+# Separates the outputs of commands batched into a single adb shell call
+SECTION_SEPARATOR = "__SEP__"
+
+# Block devices that never hold anything worth imaging (RAM disks, swap,
+# loop mounts and device-mapper overlays of other partitions)
+SKIP_PREFIXES = ("ram", "zram", "loop", "dm-")
+
+# Device directory the shell user can write, for dd's error reports
+DD_ERROR_DIR = "/data/local/tmp"
+
+# dd's transfer statistics, which are not errors
+_DD_STATS_RE = re.compile(r'^\d+\+\d+ records (in|out)$|^\d+ bytes .* copied')
+
+# `ls -la` lines for block devices and symlinks
+_BRW_RE = re.compile(rb'^brw\S*.*\s+(\S+)\s*$', re.MULTILINE)
+_SYMLINK_RE = re.compile(rb'^l\S*.*\s(\S+)\s+->\s+(\S+)\s*$', re.MULTILINE)
+
 
 def setup_dump_directory() -> Path:
     """Create and return the dump directory path."""
     dump_dir = DUMP_DIR
-    dump_dir.mkdir(parents=True, exist_ok=True)
     
-    # Create subdirectories
-    (dump_dir / "images").mkdir(exist_ok=True)
-    (dump_dir / "info").mkdir(exist_ok=True)
+    # Create subdirectories, along with the dump directory itself
+    for subdir in ("images", "info"):
+        os.makedirs(dump_dir / subdir, exist_ok=True)
     
     return dump_dir
 
 
-def run_adb_command(command: List[str], check: bool = True) -> Tuple[int, str, str]:
+def run_adb_command(
+    command: List[str],
+    check: bool = True,
+    adb_shell: Optional[AdbShell] = None,
+    binary: bool = False,
+) -> Tuple[int, Union[str, bytes], Union[str, bytes]]:
     """
     Run an ADB command and return the exit code, stdout, and stderr.
     
     Args:
         command: The ADB command to run as a list of strings.
         check: Whether to raise an exception if the command fails.
+        adb_shell: Optional persistent shell session. `adb shell ...` commands
+                   are sent through it instead of spawning a new adb client.
+        binary: Return stdout/stderr as bytes, skipping the decode for output
+                that is only parsed and saved.
     
     Returns:
         Tuple of (exit_code, stdout, stderr)
@@ -49,11 +82,19 @@ def run_adb_command(command: List[str], check: bool = True) -> Tuple[int, str, s
     Raises:
         subprocess.CalledProcessError: If check is True and the command fails.
     """
+    if adb_shell is not None and command[:2] == ["adb", "shell"] and len(command) > 2:
+        # adb joins the shell arguments with spaces, so do the same here
+        returncode, stdout, stderr = adb_shell.run(" ".join(command[2:]), binary=binary)
+        if check and returncode != 0:
+            e = subprocess.CalledProcessError(returncode, command)
+            print(f"Error running command {' '.join(command)}: {e}")
+        return returncode, stdout, stderr
+    
     try:
         result = subprocess.run(
             command,
             capture_output=True,
-            text=True,
+            text=not binary,
             check=check
         )
         return result.returncode, result.stdout, result.stderr
@@ -62,58 +103,80 @@ def run_adb_command(command: List[str], check: bool = True) -> Tuple[int, str, s
         return e.returncode, e.stdout, e.stderr
 
 
-def save_to_file(path: Path, content: str) -> None:
-    """Save content to a file."""
-    with open(path, 'w', encoding='utf-8') as f:
-        f.write(content)
+def save_to_file(path: Path, content: Union[str, bytes]) -> None:
+    """Save text or raw bytes to a file."""
+    if isinstance(content, bytes):
+        path.write_bytes(content)
+    else:
+        path.write_text(content, encoding='utf-8')
 
 
-def identify_block_devices(dump_dir: Path) -> List[str]:
+def get_by_name_map(dump_dir: Path, adb_shell: AdbShell) -> Dict[str, str]:
+    """
+    Get a mapping of partition names to their block devices.
+    
+    The `/dev/block/by-name/` listing is fetched once and parsed in a single pass
+    so the bootloader and full dumps can share it.
+    
+    Returns:
+        Dictionary mapping partition names to resolved block device paths
+    """
+    _, block_devices_by_name, _ = run_adb_command(["adb", "shell", "ls", "-la", "/dev/block/by-name/"], check=False, adb_shell=adb_shell, binary=True)
+    save_to_file(dump_dir / "info" / "block_devices_by_name.txt", block_devices_by_name)
+    
+    # Only the matched names and targets are decoded
+    by_name = {}
+    for name, target in _SYMLINK_RE.findall(block_devices_by_name):
+        name, target = name.decode(errors="replace"), target.decode(errors="replace")
+        if target.startswith("../"):
+            target = target.replace("../", "/dev/block/")
+        by_name[name] = target
+    
+    return by_name
+
+
+def identify_block_devices(dump_dir: Path, adb_shell: AdbShell, by_name: Dict[str, str]) -> List[str]:
     """
     Identify all block devices on the device.
     
+    Args:
+        dump_dir: Directory to save the output
+        adb_shell: Persistent shell session for device commands
+        by_name: Mapping of partition names to block devices from get_by_name_map
+    
     Returns:
         List of block device paths
     """
     print("Identifying block devices...")
     info_dir = dump_dir / "info"
     
-    # Get list of block devices
-    _, block_devices, _ = run_adb_command(["adb", "shell", "ls", "-la", "/dev/block/"], check=False)
+    # Get the list of block devices and partition information in one round-trip
+    _, output, _ = run_adb_command(
+        ["adb", "shell", f"ls -la /dev/block/; echo {SECTION_SEPARATOR}; cat /proc/partitions"],
+        check=False,
+        adb_shell=adb_shell,
+        binary=True,
+    )
+    block_devices, _, partitions = output.partition(f"{SECTION_SEPARATOR}\n".encode())
     save_to_file(info_dir / "block_devices.txt", block_devices)
-    
-    # Get more detailed information
-    _, block_devices_by_name, _ = run_adb_command(["adb", "shell", "ls", "-la", "/dev/block/by-name/"], check=False)
-    save_to_file(info_dir / "block_devices_by_name.txt", block_devices_by_name)
-    
-    # Get partition information
-    _, partitions, _ = run_adb_command(["adb", "shell", "cat", "/proc/partitions"], check=False)
     save_to_file(info_dir / "proc_partitions.txt", partitions)
     
-    # Parse block devices
-    block_device_paths = []
-    for line in block_devices.splitlines():
-        if "brw" in line:  # Block device
-            parts = line.split()
-            if len(parts) >= 10:
-                device_name = parts[-1]
-                if not device_name.startswith("loop"):  # Skip loop devices
-                    block_device_paths.append(f"/dev/block/{device_name}")
+    # Parse block devices, deduplicating as we go
+    block_device_paths = {
+        f"/dev/block/{device_name.decode(errors='replace')}"
+        for device_name in _BRW_RE.findall(block_devices)
+        if not device_name.decode(errors='replace').startswith(SKIP_PREFIXES)
+    }
     
     # Also add named partitions
-    for line in block_devices_by_name.splitlines():
-        if "->" in line:  # Symlink
-            parts = line.split()
-            if len(parts) >= 11:
-                device_name = parts[-3]
-                if not device_name.startswith("loop"):  # Skip loop devices
-                    target = parts[-1]
-                    if target.startswith("../"):
-                        target = target.replace("../", "/dev/block/")
-                    block_device_paths.append(target)
-    
-    # Remove duplicates
-    block_device_paths = list(set(block_device_paths))
+    block_device_paths.update(
+        target for name, target in by_name.items()
+        if not name.startswith(SKIP_PREFIXES)
+        and not target.rsplit("/", 1)[-1].startswith(SKIP_PREFIXES)
+    )
+    
+    # Sort for a reproducible dump order
+    block_device_paths = sorted(block_device_paths)
     
     # Save the list of identified block devices
     save_to_file(info_dir / "identified_block_devices.txt", "\n".join(block_device_paths))
@@ -121,16 +184,18 @@ def identify_block_devices(dump_dir: Path) -> List[str]:
     return block_device_paths
 
 
-def dump_partition(dump_dir: Path, device_path: str) -> bool:
+def dump_partition(dump_dir: Path, device_path: str, adb_shell: AdbShell) -> Optional[bool]:
     """
     Attempt to dump a partition using dd.
     
     Args:
         dump_dir: Directory to save the dump
         device_path: Path to the block device
+        adb_shell: Persistent shell session for device commands
     
     Returns:
-        True if successful, False otherwise
+        True if successful, None if the partition is empty and was skipped,
+        False otherwise
     """
     images_dir = dump_dir / "images"
     device_name = device_path.split("/")[-1]
@@ -139,7 +204,7 @@ def dump_partition(dump_dir: Path, device_path: str) -> bool:
     print(f"Attempting to dump {device_path} to {output_file}...")
     
     # First, get the size of the partition
-    _, size_output, _ = run_adb_command(["adb", "shell", f"blockdev --getsize64 {device_path}"], check=False)
+    _, size_output, _ = run_adb_command(["adb", "shell", f"blockdev --getsize64 {device_path}"], check=False, adb_shell=adb_shell)
     
     if not size_output or "Permission denied" in size_output or "No such file or directory" in size_output:
         print(f"  Failed to get size of {device_path}: {size_output}")
@@ -149,24 +214,42 @@ def dump_partition(dump_dir: Path, device_path: str) -> bool:
         size = int(size_output.strip())
         print(f"  Partition size: {size} bytes ({size / (1024*1024):.2f} MB)")
         
-        # Use dd to dump the partition
-        dd_command = f"dd if={device_path} of=/data/local/tmp/{device_name}.img bs=4096"
-        _, dd_output, _ = run_adb_command(["adb", "shell", dd_command], check=False)
+        if size == 0:
+            print(f"  Skipping empty partition {device_path}")
+            return None
         
-        if "Permission denied" in dd_output or "Operation not permitted" in dd_output:
-            print(f"  Failed to dump {device_path}: Permission denied")
-            return False
+        # Stream the partition straight to the host instead of staging it on the
+        # device. exec-out merges the remote stderr into stdout, so dd's stderr
+        # and exit code go to a file on the device to keep them out of the image.
+        block_size = 1024 * 1024
+        block_count = -(-size // block_size)
+        error_path = f"{DD_ERROR_DIR}/unrayneo_dd_{device_name}.err"
+        dd_command = [
+            "adb", "exec-out",
+            f"dd if={device_path} bs={block_size} count={block_count} 2>{error_path}; echo $? >>{error_path}",
+        ]
+        with open(output_file, "wb") as f:
+            process = subprocess.Popen(dd_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            shutil.copyfileobj(process.stdout, f, length=4 * 1024 * 1024)
+            _, adb_error = process.communicate()
         
-        # Pull the file from the device
-        pull_command = ["adb", "pull", f"/data/local/tmp/{device_name}.img", str(output_file)]
-        _, pull_output, _ = run_adb_command(pull_command, check=False)
+        # Read back what dd reported; the last line is its exit code
+        _, dd_report, _ = adb_shell.run(f"cat {error_path}; rm -f {error_path}")
+        report_lines = dd_report.strip().splitlines()
+        dd_exit = report_lines.pop() if report_lines else ""
+        dd_error = "\n".join(line for line in report_lines if not _DD_STATS_RE.match(line)).strip()
         
-        if "No such file or directory" in pull_output or "failed to copy" in pull_output:
-            print(f"  Failed to pull {device_name}.img from device")
+        if process.returncode != 0 or dd_exit != "0" or output_file.stat().st_size == 0:
+            reason = dd_error or adb_error.decode("utf-8", "replace").strip()
+            if not reason:
+                reason = f"dd exited with status {dd_exit}" if dd_exit else "no data was read"
+            print(f"  Failed to dump {device_path}: {reason}")
+            output_file.unlink()
             return False
         
-        # Clean up the temporary file
-        _, _, _ = run_adb_command(["adb", "shell", f"rm /data/local/tmp/{device_name}.img"], check=False)
+        dumped_size = output_file.stat().st_size
+        if dumped_size != size:
+            print(f"  Warning: dumped {dumped_size} of {size} bytes from {device_path}")
         
         print(f"  Successfully dumped {device_path} to {output_file}")
         return True
@@ -176,7 +259,7 @@ def dump_partition(dump_dir: Path, device_path: str) -> bool:
         return False
 
 
-def dump_bootloader(dump_dir: Path) -> None:
+def dump_bootloader(dump_dir: Path, adb_shell: AdbShell, by_name: Dict[str, str]) -> None:
     """
     Attempt to dump bootloader-related partitions.
     """
@@ -188,38 +271,38 @@ def dump_bootloader(dump_dir: Path) -> None:
         "vendor_boot", "init_boot"
     ]
     
-    # Get list of block devices by name
-    _, block_devices_by_name, _ = run_adb_command(["adb", "shell", "ls", "-la", "/dev/block/by-name/"], check=False)
-    
+    # Look up each partition and its A/B slots directly in the by-name map
     for partition in bootloader_partitions:
-        for line in block_devices_by_name.splitlines():
-            if f"{partition} ->" in line or f"{partition}_" in line:
-                parts = line.split()
-                if len(parts) >= 11:
-                    target = parts[-1]
-                    if target.startswith("../"):
-                        target = target.replace("../", "/dev/block/")
-                        dump_partition(dump_dir, target)
+        for name in (partition, f"{partition}_a", f"{partition}_b"):
+            target = by_name.get(name)
+            if target:
+                dump_partition(dump_dir, target, adb_shell)
 
 
-def dump_all_partitions(dump_dir: Path) -> None:
+def dump_all_partitions(
+    dump_dir: Path,
+    adb_shell: AdbShell,
+    by_name: Dict[str, str],
+    workers: int = MAX_WORKERS,
+) -> None:
     """
     Attempt to dump all identified partitions.
+    
+    Partitions are dumped by a thread pool so several dd/pull transfers overlap.
     """
     print("Attempting to dump all partitions...")
-    block_devices = identify_block_devices(dump_dir)
+    block_devices = identify_block_devices(dump_dir, adb_shell, by_name)
     
-    successful_dumps = 0
-    failed_dumps = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(partial(dump_partition, dump_dir, adb_shell=adb_shell), block_devices))
     
-    for device in block_devices:
-        if dump_partition(dump_dir, device):
-            successful_dumps += 1
-        else:
-            failed_dumps += 1
+    successful_dumps = results.count(True)
+    skipped_dumps = results.count(None)
+    failed_dumps = results.count(False)
     
     print(f"\nPartition dump summary:")
     print(f"  Successfully dumped: {successful_dumps} partitions")
+    print(f"  Skipped (empty): {skipped_dumps} partitions")
     print(f"  Failed to dump: {failed_dumps} partitions")
     
     if failed_dumps > 0:
@@ -232,6 +315,16 @@ def dump_all_partitions(dump_dir: Path) -> None:
 
 def main():
     """Main function to coordinate the raw partition dump."""
+    parser = argparse.ArgumentParser(description="Dump raw partition images from RanNeo X2 AR glasses")
+    parser.add_argument(
+        "-j", "--workers",
+        type=int,
+        default=MAX_WORKERS,
+        help=f"Number of partitions to dump in parallel (default: {MAX_WORKERS})",
+    )
+    args = parser.parse_args()
+    workers = max(1, args.workers)
+    
     print(f"Starting RAW partition dump for RanNeo X2 AR Glasses...")
     print(f"All data will be saved to: {DUMP_DIR}")
     print(f"WARNING: This operation may require root access or an unlocked bootloader.")
@@ -240,11 +333,18 @@ def main():
     # Set up the dump directory
     dump_dir = setup_dump_directory()
     
-    # Try to dump bootloader partitions specifically
-    dump_bootloader(dump_dir)
+    start_adb_server()
     
-    # Try to dump all partitions
-    dump_all_partitions(dump_dir)
+    # Reuse adb shell sessions for all probe commands, one per worker
+    with AdbShell(max_sessions=workers) as adb_shell:
+        # Fetch the by-name listing once for both passes
+        by_name = get_by_name_map(dump_dir, adb_shell)
+        
+        # Try to dump bootloader partitions specifically
+        dump_bootloader(dump_dir, adb_shell, by_name)
+        
+        # Try to dump all partitions
+        dump_all_partitions(dump_dir, adb_shell, by_name, workers)
     
     print(f"\nRaw partition dump completed! All data saved to: {dump_dir}")
 
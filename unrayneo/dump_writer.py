@@ -0,0 +1,177 @@
+"""
+Background file writer shared by the dump utilities.
+
+Dump files are handed to a single writer thread so that local disk writes
+overlap with the next adb round-trip instead of blocking it. The writer can
+also collect every file into a single tar archive.
+"""
+import io
+import os
+import queue
+import tarfile
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple, Union
+
+# Gzip level of compressed archives
+GZIP_LEVEL = 1
+
+
+class DumpWriter:
+    """
+    Queue of pending file writes drained by one background thread.
+
+    The thread is started on the first write. `close()` waits for every
+    queued write to finish; the writer can be used again afterwards.
+
+    After `open_archive()`, files are added to a tar archive instead of being
+    written individually. Member names are relative to the archive root,
+    prefixed with the root directory's name unless asked otherwise. The
+    archive is fsynced once when it is closed.
+
+    Usage:
+        writer = DumpWriter()
+        writer.write(path, "content")
+        writer.close()
+    """
+
+    def __init__(self, max_pending: int = 256):
+        # Bounded so a slow disk applies back-pressure instead of holding
+        # every dump in memory
+        self._queue: "queue.Queue[Optional[Tuple[Path, Union[str, bytes]]]]" = queue.Queue(max_pending)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._archive_path: Optional[Path] = None
+        self._archive_root: Optional[Path] = None
+        self._archive_mode = "w:gz"
+        self._archive_prefix = True
+        self._archive_file: Optional[BinaryIO] = None
+        self._archive: Optional[tarfile.TarFile] = None
+
+    @property
+    def archive_path(self) -> Optional[Path]:
+        """Path of the archive being written, or None when writing plain files."""
+        return self._archive_path
+
+    def open_archive(
+        self,
+        archive_path: Path,
+        root: Path,
+        compress: bool = True,
+        prefix_root: bool = True,
+    ) -> None:
+        """
+        Collect all following writes into a single tar archive.
+
+        Args:
+            archive_path: Path of the archive to create.
+            root: Directory the written paths are relative to.
+            compress: Gzip the archive (.tar.gz) instead of writing a plain .tar.
+            prefix_root: Prefix member names with the root directory's name.
+                         Turn this off for an archive stored inside the root.
+        """
+        self._archive_path = archive_path
+        self._archive_root = root
+        self._archive_mode = "w:gz" if compress else "w"
+        self._archive_prefix = prefix_root
+
+    def read(self, path: Path) -> Optional[bytes]:
+        """
+        Read back a file written earlier, from the archive or from disk.
+
+        Call this after `close()`, once every queued write has landed.
+
+        Args:
+            path: Path the file was written to.
+
+        Returns:
+            The file content, or None if it was never written
+        """
+        if self._archive_path is None:
+            try:
+                return path.read_bytes()
+            except FileNotFoundError:
+                return None
+        try:
+            with tarfile.open(self._archive_path, "r") as archive:
+                member = archive.extractfile(self._member_name(path))
+                return member.read() if member is not None else None
+        except (KeyError, FileNotFoundError):
+            return None
+
+    def write(self, path: Path, content: Union[str, bytes]) -> None:
+        """
+        Queue text or raw bytes to be written to a file.
+
+        Args:
+            path: Destination file path.
+            content: Text (written as UTF-8) or bytes (written as-is).
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._queue.put((path, content))
+
+    def flush(self) -> None:
+        """Wait until every queued write has been written."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write everything still queued and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+            # One fsync for the whole archive instead of one per file
+            self._archive_file.flush()
+            os.fsync(self._archive_file.fileno())
+            self._archive_file.close()
+            self._archive_file = None
+
+    def _run(self) -> None:
+        """Drain the queue until the stop sentinel arrives."""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                path, content = item
+                if self._archive_path is not None:
+                    self._add_to_archive(path, content)
+                elif isinstance(content, bytes):
+                    path.write_bytes(content)
+                else:
+                    path.write_text(content, encoding="utf-8")
+            except (OSError, tarfile.TarError) as e:
+                print(f"Error writing {item[0]}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _add_to_archive(self, path: Path, content: Union[str, bytes]) -> None:
+        """Append one file to the archive, opening it on first use."""
+        if self._archive is None:
+            self._archive_path.parent.mkdir(parents=True, exist_ok=True)
+            self._archive_file = open(self._archive_path, "wb")
+            # The fastest gzip level keeps the single writer thread from
+            # becoming the bottleneck, while text still shrinks several times
+            options = {"compresslevel": GZIP_LEVEL} if self._archive_mode == "w:gz" else {}
+            self._archive = tarfile.open(fileobj=self._archive_file, mode=self._archive_mode, **options)
+        data = content if isinstance(content, bytes) else content.encode("utf-8")
+        info = tarfile.TarInfo(self._member_name(path))
+        info.size = len(data)
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        self._archive.addfile(info, io.BytesIO(data))
+
+    def _member_name(self, path: Path) -> str:
+        """Name of the archive member holding the file written to path."""
+        name = path.relative_to(self._archive_root)
+        if self._archive_prefix:
+            name = self._archive_root.name / name
+        return name.as_posix()
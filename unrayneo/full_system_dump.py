@@ -5,30 +5,69 @@ This script performs a comprehensive dump of ALL system information from RanNeo
 It uses alternative methods to extract as much data as possible without requiring root access.
 All data is saved to the secret directory to protect potentially sensitive information.
 """
+import argparse
 import os
+import re
+import shlex
 import subprocess
 import sys
+import tarfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 import shutil
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union
 
 # Import project settings
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 import settings
+from unrayneo.adb_shell import AdbShell, adb_concurrency, start_adb_server
+from unrayneo.dump_writer import DumpWriter
 
 # Create timestamp for the dump directory
 TIMESTAMP = datetime.now().strftime("%Y%m%d_%H%M%S")
 DUMP_DIR = settings.SECRET_DIR / f"full_system_dump_{TIMESTAMP}"
+DUMP_ARCHIVE = DUMP_DIR.with_suffix(".tar.gz")
 
+# Writes dump files in the background while the next adb command runs
+dump_writer = DumpWriter()
 
-def setup_dump_directory() -> Path:
-    """Create and return the dump directory path."""
+# Number of services/packages dumped in parallel, each over its own adb shell
+MAX_WORKERS = adb_concurrency()
+
+# Extensions of the config files pulled from system directories
+CONFIG_EXTENSIONS = [".xml", ".conf", ".json", ".prop", ".rc"]
+
+# Matches one `package:<path>=<name>` line of `pm list packages -f`; the path
+# itself may contain '=', so it extends to the last one
+_PKG_PATH_RE = re.compile(r'^package:(\S+)=(\S+?)\s*$', re.MULTILINE)
+
+# Keeps progress lines from worker threads from interleaving
+_print_lock = threading.Lock()
+
+
+def log_progress(message: str) -> None:
+    """Print a progress message from any thread."""
+    with _print_lock:
+        print(message)
+
+
+def setup_dump_directory(unpacked: bool = True) -> Path:
+    """
+    Create and return the dump directory path.
+    
+    When the dump is collected into an archive, only the secret directory
+    the archive lives in is created.
+    """
     dump_dir = DUMP_DIR
-    dump_dir.mkdir(parents=True, exist_ok=True)
     
-    # Create subdirectories
+    if not unpacked:
+        os.makedirs(settings.SECRET_DIR, exist_ok=True)
+        return dump_dir
+    
+    # Create subdirectories, along with the dump directory itself
     subdirs = [
         "partitions", "props", "apks", "logs", "bootloader", "bluetooth",
         "input", "services", "firmware", "hardware", "security", "system_files",
@@ -37,18 +76,27 @@ def setup_dump_directory() -> Path:
     ]
     
     for subdir in subdirs:
-        (dump_dir / subdir).mkdir(exist_ok=True)
+        os.makedirs(dump_dir / subdir, exist_ok=True)
     
     return dump_dir
 
 
-def run_adb_command(command: List[str], check: bool = True) -> Tuple[int, str, str]:
+def run_adb_command(
+    command: List[str],
+    check: bool = True,
+    adb_shell: Optional[AdbShell] = None,
+    binary: bool = False,
+) -> Tuple[int, Union[str, bytes], Union[str, bytes]]:
     """
     Run an ADB command and return the exit code, stdout, and stderr.
     
     Args:
         command: The ADB command to run as a list of strings.
         check: Whether to raise an exception if the command fails.
+        adb_shell: Optional persistent shell session. `adb shell ...` commands
+                   are sent through it instead of spawning a new adb client.
+        binary: Return stdout/stderr as bytes, skipping the decode for output
+                that is only saved.
     
     Returns:
         Tuple of (exit_code, stdout, stderr)
@@ -56,11 +104,19 @@ def run_adb_command(command: List[str], check: bool = True) -> Tuple[int, str, s
     Raises:
         subprocess.CalledProcessError: If check is True and the command fails.
     """
+    if adb_shell is not None and command[:2] == ["adb", "shell"] and len(command) > 2:
+        # adb joins the shell arguments with spaces, so do the same here
+        returncode, stdout, stderr = adb_shell.run(" ".join(command[2:]), binary=binary)
+        if check and returncode != 0:
+            e = subprocess.CalledProcessError(returncode, command)
+            print(f"Error running command {' '.join(command)}: {e}")
+        return returncode, stdout, stderr
+    
     try:
         result = subprocess.run(
             command,
             capture_output=True,
-            text=True,
+            text=not binary,
             check=check
         )
         return result.returncode, result.stdout, result.stderr
@@ -69,13 +125,12 @@ def run_adb_command(command: List[str], check: bool = True) -> Tuple[int, str, s
         return e.returncode, e.stdout, e.stderr
 
 
-def save_to_file(path: Path, content: str) -> None:
-    """Save content to a file."""
-    with open(path, 'w', encoding='utf-8') as f:
-        f.write(content)
+def save_to_file(path: Path, content: Union[str, bytes]) -> None:
+    """Queue text or raw bytes to be written to a file by the background writer."""
+    dump_writer.write(path, content)
 
 
-def dump_all_properties(dump_dir: Path) -> None:
+def dump_all_properties(dump_dir: Path, adb_shell: AdbShell) -> None:
     """
     Dump ALL system properties.
     """
@@ -83,7 +138,7 @@ def dump_all_properties(dump_dir: Path) -> None:
     props_dir = dump_dir / "props"
     
     # Get all properties
-    _, all_props, _ = run_adb_command(["adb", "shell", "getprop"])
+    _, all_props, _ = run_adb_command(["adb", "shell", "getprop"], adb_shell=adb_shell, binary=True)
     save_to_file(props_dir / "all_properties.txt", all_props)
     
     # Get properties by category
@@ -93,12 +148,15 @@ def dump_all_properties(dump_dir: Path) -> None:
         "camera", "audio", "media", "display", "hw", "security"
     ]
     
+    # Filter the single getprop listing locally instead of re-running it per category
+    prop_lines = all_props.splitlines(keepends=True)
     for category in categories:
-        _, category_props, _ = run_adb_command(["adb", "shell", "getprop", "|", "grep", category])
+        category_bytes = category.encode()
+        category_props = b"".join(line for line in prop_lines if category_bytes in line)
         save_to_file(props_dir / f"{category}_properties.txt", category_props)
 
 
-def dump_all_services(dump_dir: Path) -> None:
+def dump_all_services(dump_dir: Path, adb_shell: AdbShell) -> None:
     """
     Dump ALL system services.
     """
@@ -106,11 +164,11 @@ def dump_all_services(dump_dir: Path) -> None:
     services_dir = dump_dir / "services"
     
     # Get list of all services
-    _, services_list, _ = run_adb_command(["adb", "shell", "service", "list"])
+    _, services_list, _ = run_adb_command(["adb", "shell", "service", "list"], adb_shell=adb_shell, binary=True)
     save_to_file(services_dir / "services_list.txt", services_list)
     
     # Dump all services using dumpsys
-    _, all_services, _ = run_adb_command(["adb", "shell", "dumpsys", "-l"])
+    _, all_services, _ = run_adb_command(["adb", "shell", "dumpsys", "-l"], adb_shell=adb_shell)
     service_names = []
     
     for line in all_services.splitlines():
@@ -118,14 +176,17 @@ def dump_all_services(dump_dir: Path) -> None:
         if line and not line.startswith("Currently running services:"):
             service_names.append(line)
     
-    for service in service_names:
-        print(f"  Dumping service: {service}")
-        _, service_dump, _ = run_adb_command(["adb", "shell", "dumpsys", service], check=False)
+    def dump_service(service: str) -> None:
+        log_progress(f"  Dumping service: {service}")
+        _, service_dump, _ = run_adb_command(["adb", "shell", "dumpsys", service], check=False, adb_shell=adb_shell, binary=True)
         safe_name = service.replace(".", "_").replace("/", "_").replace(":", "_")
         save_to_file(services_dir / f"{safe_name}.txt", service_dump)
+    
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        list(executor.map(dump_service, service_names))
 
 
-def dump_all_packages(dump_dir: Path) -> None:
+def dump_all_packages(dump_dir: Path, adb_shell: AdbShell) -> None:
     """
     Dump ALL package information.
     """
@@ -133,29 +194,32 @@ def dump_all_packages(dump_dir: Path) -> None:
     packages_dir = dump_dir / "packages"
     
     # Get list of all packages
-    _, packages, _ = run_adb_command(["adb", "shell", "pm", "list", "packages", "-f"])
+    _, packages, _ = run_adb_command(["adb", "shell", "pm", "list", "packages", "-f"], adb_shell=adb_shell)
     save_to_file(packages_dir / "all_packages.txt", packages)
     
     # Get detailed package info for all packages
-    package_names = []
-    for line in packages.splitlines():
-        if line.startswith("package:"):
-            parts = line.split("=")
-            if len(parts) > 1:
-                package_names.append(parts[1])
-    
-    for package in package_names:
-        print(f"  Dumping package info: {package}")
-        _, package_info, _ = run_adb_command(["adb", "shell", "dumpsys", "package", package], check=False)
-        safe_name = package.replace(".", "_")
-        save_to_file(packages_dir / f"{safe_name}_info.txt", package_info)
-        
-        # Get permissions for the package
-        _, permissions, _ = run_adb_command(["adb", "shell", "dumpsys", "package", package, "|", "grep", "permission"], check=False)
-        save_to_file(packages_dir / f"{safe_name}_permissions.txt", permissions)
+    package_names = [package for _, package in _PKG_PATH_RE.findall(packages)]
+    
+    def dump_packages(batch: List[str]) -> None:
+        # One round-trip per batch; the permission lines are sliced out locally
+        results = adb_shell.run_batch({package: f"dumpsys package {package}" for package in batch})
+        for package in batch:
+            log_progress(f"  Dumping package info: {package}")
+            _, package_info = results[package]
+            safe_name = package.replace(".", "_")
+            save_to_file(packages_dir / f"{safe_name}_info.txt", package_info)
+            
+            # Get permissions for the package
+            permissions = "".join(line for line in package_info.splitlines(keepends=True) if "permission" in line)
+            save_to_file(packages_dir / f"{safe_name}_permissions.txt", permissions)
+    
+    # Split the packages into one batch per worker
+    batches = [package_names[i::MAX_WORKERS] for i in range(MAX_WORKERS)]
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        list(executor.map(dump_packages, [batch for batch in batches if batch]))
 
 
-def dump_all_settings(dump_dir: Path) -> None:
+def dump_all_settings(dump_dir: Path, adb_shell: AdbShell) -> None:
     """
     Dump ALL system settings.
     """
@@ -165,12 +229,15 @@ def dump_all_settings(dump_dir: Path) -> None:
     # Get all settings
     settings_types = ["system", "secure", "global"]
     
-    for setting_type in settings_types:
-        _, settings_values, _ = run_adb_command(["adb", "shell", "settings", "list", setting_type])
+    def dump_settings(setting_type: str) -> None:
+        _, settings_values, _ = run_adb_command(["adb", "shell", "settings", "list", setting_type], adb_shell=adb_shell, binary=True)
         save_to_file(settings_dir / f"{setting_type}_settings.txt", settings_values)
+    
+    with ThreadPoolExecutor(max_workers=len(settings_types)) as executor:
+        list(executor.map(dump_settings, settings_types))
 
 
-def dump_all_databases(dump_dir: Path) -> None:
+def dump_all_databases(dump_dir: Path, adb_shell: AdbShell) -> None:
     """
     Dump information about system databases.
     """
@@ -178,25 +245,34 @@ def dump_all_databases(dump_dir: Path) -> None:
     db_dir = dump_dir / "databases"
     
     # Find all SQLite databases
-    _, databases, _ = run_adb_command(["adb", "shell", "find", "/data/data", "-name", "*.db", "2>/dev/null"], check=False)
+    _, databases, _ = run_adb_command(["adb", "shell", "find", "/data/data", "-name", "*.db", "2>/dev/null"], check=False, adb_shell=adb_shell)
     save_to_file(db_dir / "database_paths.txt", databases)
     
-    # Try to get database schemas where possible
-    for line in databases.splitlines():
-        if not line or "Permission denied" in line:
+    db_paths = [
+        line.strip() for line in databases.splitlines()
+        if line and "Permission denied" not in line
+    ]
+    
+    # Read every readable database's schema in batched scripts; unreadable
+    # databases are skipped on the device without a round-trip of their own
+    schemas = adb_shell.run_batch({
+        db_path: f"test -r {shlex.quote(db_path)} && sqlite3 {shlex.quote(db_path)} '.schema' 2>/dev/null"
+        for db_path in db_paths
+    })
+    
+    for db_path in db_paths:
+        returncode, schema = schemas[db_path]
+        if returncode != 0:
             continue
         
-        db_path = line.strip()
         db_name = os.path.basename(db_path)
-        print(f"  Attempting to get schema for: {db_name}")
-        
-        _, schema, _ = run_adb_command(["adb", "shell", f"sqlite3 {db_path} '.schema' 2>/dev/null"], check=False)
+        print(f"  Got schema for: {db_name}")
         if schema and "Error" not in schema and "Permission denied" not in schema:
             safe_name = db_name.replace(".", "_")
             save_to_file(db_dir / f"{safe_name}_schema.txt", schema)
 
 
-def dump_all_hardware_info(dump_dir: Path) -> None:
+def dump_all_hardware_info(dump_dir: Path, adb_shell: AdbShell) -> None:
     """
     Dump ALL hardware information.
     """
@@ -204,15 +280,16 @@ def dump_all_hardware_info(dump_dir: Path) -> None:
     hw_dir = dump_dir / "hardware"
     
     # CPU info
-    _, cpu_info, _ = run_adb_command(["adb", "shell", "cat", "/proc/cpuinfo"])
+    _, cpu_info, _ = run_adb_command(["adb", "shell", "cat", "/proc/cpuinfo"], adb_shell=adb_shell, binary=True)
     save_to_file(hw_dir / "cpu_info.txt", cpu_info)
     
     # Memory info
-    _, memory_info, _ = run_adb_command(["adb", "shell", "cat", "/proc/meminfo"])
+    _, memory_info, _ = run_adb_command(["adb", "shell", "cat", "/proc/meminfo"], adb_shell=adb_shell, binary=True)
     save_to_file(hw_dir / "memory_info.txt", memory_info)
     
     # Device tree
-    _, device_tree, _ = run_adb_command(["adb", "shell", "find", "/proc/device-tree", "-type", "f", "-exec", "echo", "{}", ";", "-exec", "cat", "{}", ";", "2>/dev/null"], check=False)
+    # The -exec terminators are escaped, otherwise the device shell treats them as command separators
+    _, device_tree, _ = run_adb_command(["adb", "shell", "find /proc/device-tree -type f -exec echo {} \\; -exec cat {} \\; 2>/dev/null"], check=False, adb_shell=adb_shell, binary=True)
     save_to_file(hw_dir / "device_tree.txt", device_tree)
     
     # Hardware components
@@ -230,11 +307,11 @@ def dump_all_hardware_info(dump_dir: Path) -> None:
     }
     
     for component, command in components.items():
-        _, output, _ = run_adb_command(command, check=False)
+        _, output, _ = run_adb_command(command, check=False, adb_shell=adb_shell, binary=True)
         save_to_file(hw_dir / f"{component}_info.txt", output)
 
 
-def dump_all_system_files(dump_dir: Path) -> None:
+def dump_all_system_files(dump_dir: Path, adb_shell: AdbShell) -> None:
     """
     Attempt to dump all accessible system files.
     """
@@ -261,13 +338,18 @@ def dump_all_system_files(dump_dir: Path) -> None:
     for directory in system_dirs:
         dir_name = directory.replace("/", "_").strip("_")
         target_dir = files_dir / dir_name
-        target_dir.mkdir(exist_ok=True)
+        if dump_writer.archive_path is None:
+            target_dir.mkdir(exist_ok=True)
         
         print(f"  Listing files in {directory}...")
-        _, file_list, _ = run_adb_command(["adb", "shell", f"find {directory} -type f -name '*.xml' -o -name '*.conf' -o -name '*.json' -o -name '*.prop' -o -name '*.rc' 2>/dev/null"], check=False)
+        _, file_list, _ = run_adb_command(["adb", "shell", f"find {directory} -type f -name '*.xml' -o -name '*.conf' -o -name '*.json' -o -name '*.prop' -o -name '*.rc' 2>/dev/null"], check=False, adb_shell=adb_shell)
         save_to_file(target_dir / "file_list.txt", file_list)
         
-        # Try to pull some important config files
+        # Pull all matching config files in a single tar stream
+        if pull_files_as_tar(directory, target_dir):
+            continue
+        
+        # Fall back to reading files one by one if the device could not tar them
         for line in file_list.splitlines():
             if not line or "Permission denied" in line:
                 continue
@@ -275,33 +357,92 @@ def dump_all_system_files(dump_dir: Path) -> None:
             file_path = line.strip()
             file_name = os.path.basename(file_path)
             
-            if any(ext in file_name for ext in [".xml", ".conf", ".json", ".prop", ".rc"]):
+            if any(ext in file_name for ext in CONFIG_EXTENSIONS):
                 print(f"    Attempting to extract: {file_name}")
-                _, file_content, _ = run_adb_command(["adb", "shell", f"cat {file_path} 2>/dev/null"], check=False)
+                _, file_content, _ = run_adb_command(["adb", "shell", f"cat {file_path} 2>/dev/null"], check=False, adb_shell=adb_shell)
                 
                 if file_content and "Permission denied" not in file_content:
                     safe_name = file_name.replace("/", "_")
                     save_to_file(target_dir / safe_name, file_content)
 
 
+def pull_files_as_tar(directory: str, target_dir: Path) -> bool:
+    """
+    Pull the config files under a device directory as one tar stream.
+    
+    The device finds and archives the files itself and the stream is unpacked
+    on the fly, so the whole directory costs one adb round-trip. Files are
+    saved flat by name, like the per-file fallback. Unreadable files are
+    skipped by tar on the device.
+    
+    Args:
+        directory: Directory on the device to search
+        target_dir: Local directory to extract the files into
+    
+    Returns:
+        True if a tar stream was received, False otherwise
+    """
+    name_filter = " -o ".join(f"-name '*{ext}'" for ext in CONFIG_EXTENSIONS)
+    # exec-out merges stderr into the stream, so keep both commands quiet
+    script = f"find {directory} -type f \\( {name_filter} \\) 2>/dev/null | tar -cf - -T - 2>/dev/null"
+    
+    process = subprocess.Popen(["adb", "exec-out", script], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        with tarfile.open(fileobj=process.stdout, mode="r|") as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                file_name = os.path.basename(member.name)
+                print(f"    Extracted: {file_name}")
+                save_to_file(target_dir / file_name, tar.extractfile(member).read())
+    except tarfile.TarError:
+        # No tar on the device, or the stream was cut short
+        return False
+    finally:
+        process.stdout.close()
+        process.wait()
+    
+    return True
+
+
 def main():
     """Main function to coordinate the full system dump."""
+    parser = argparse.ArgumentParser(description="Dump all accessible system information from RanNeo X2 AR glasses")
+    parser.add_argument(
+        "--unpacked",
+        action="store_true",
+        help="Write individual files into a directory instead of a single .tar.gz archive",
+    )
+    args = parser.parse_args()
+    
+    # Collect everything into one compressed archive unless asked otherwise
+    output_path = DUMP_DIR if args.unpacked else DUMP_ARCHIVE
+    if not args.unpacked:
+        dump_writer.open_archive(DUMP_ARCHIVE, DUMP_DIR)
+    
     print(f"Starting FULL system dump for RanNeo X2 AR Glasses...")
-    print(f"All data will be saved to: {DUMP_DIR}")
+    print(f"All data will be saved to: {output_path}")
     
     # Set up the dump directory
-    dump_dir = setup_dump_directory()
-    
-    # Perform comprehensive dumps
-    dump_all_properties(dump_dir)
-    dump_all_services(dump_dir)
-    dump_all_packages(dump_dir)
-    dump_all_settings(dump_dir)
-    dump_all_databases(dump_dir)
-    dump_all_hardware_info(dump_dir)
-    dump_all_system_files(dump_dir)
-    
-    print(f"\nFull system dump completed! All data saved to: {dump_dir}")
+    dump_dir = setup_dump_directory(args.unpacked)
+    
+    # Perform comprehensive dumps over persistent adb shells, one per worker
+    start_adb_server()
+    
+    try:
+        with AdbShell(max_sessions=MAX_WORKERS) as adb_shell:
+            dump_all_properties(dump_dir, adb_shell)
+            dump_all_services(dump_dir, adb_shell)
+            dump_all_packages(dump_dir, adb_shell)
+            dump_all_settings(dump_dir, adb_shell)
+            dump_all_databases(dump_dir, adb_shell)
+            dump_all_hardware_info(dump_dir, adb_shell)
+            dump_all_system_files(dump_dir, adb_shell)
+    finally:
+        # Make sure every queued file reaches the disk and the archive is finished
+        dump_writer.close()
+    
+    print(f"\nFull system dump completed! All data saved to: {output_path}")
     print("This dump includes all accessible system information without requiring root access.")
 
 
@@ -6,22 +6,28 @@ without requiring root access. It maps partition names to block devices and
 collects metadata about each partition.
 """
 import os
+import re
 import subprocess
 import sys
 import time
 from pathlib import Path
 from datetime import datetime
 import shutil
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union
 
 # Import project settings
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 import settings
+from unrayneo.adb_shell import AdbShell
+from unrayneo.dump_writer import DumpWriter
 
 # Create timestamp for the dump directory
 TIMESTAMP = datetime.now().strftime("%Y%m%d_%H%M%S")
 DUMP_DIR = settings.SECRET_DIR / f"partition_info_{TIMESTAMP}"
 
+# Writes dump files in the background while the next adb command runs
+dump_writer = DumpWriter()
+
 
 def setup_dump_directory() -> Path:
     """Create and return the dump directory path."""
@@ -30,13 +36,19 @@ def setup_dump_directory() -> Path:
     return dump_dir
 
 
-def run_adb_command(command: List[str], check: bool = True) -> Tuple[int, str, str]:
+def run_adb_command(
+    command: List[str],
+    check: bool = True,
+    adb_shell: Optional[AdbShell] = None,
+) -> Tuple[int, str, str]:
     """
     Run an ADB command and return the exit code, stdout, and stderr.
     
     Args:
         command: The ADB command to run as a list of strings.
         check: Whether to raise an exception if the command fails.
+        adb_shell: Optional persistent shell session. `adb shell ...` commands
+                   are sent through it instead of spawning a new adb client.
     
     Returns:
         Tuple of (exit_code, stdout, stderr)
@@ -44,6 +56,14 @@ def run_adb_command(command: List[str], check: bool = True) -> Tuple[int, str, s
     Raises:
         subprocess.CalledProcessError: If check is True and the command fails.
     """
+    if adb_shell is not None and command[:2] == ["adb", "shell"] and len(command) > 2:
+        # adb joins the shell arguments with spaces, so do the same here
+        returncode, stdout, stderr = adb_shell.run(" ".join(command[2:]))
+        if check and returncode != 0:
+            e = subprocess.CalledProcessError(returncode, command)
+            print(f"Error running command {' '.join(command)}: {e}")
+        return returncode, stdout, stderr
+    
     try:
         result = subprocess.run(
             command,
@@ -57,13 +77,12 @@ def run_adb_command(command: List[str], check: bool = True) -> Tuple[int, str, s
         return e.returncode, e.stdout, e.stderr
 
 
-def save_to_file(path: Path, content: str) -> None:
-    """Save content to a file."""
-    with open(path, 'w', encoding='utf-8') as f:
-        f.write(content)
+def save_to_file(path: Path, content: Union[str, bytes]) -> None:
+    """Queue text or raw bytes to be written to a file by the background writer."""
+    dump_writer.write(path, content)
 
 
-def get_partition_mapping(dump_dir: Path) -> Dict[str, str]:
+def get_partition_mapping(dump_dir: Path, adb_shell: AdbShell) -> Dict[str, str]:
     """
     Get a mapping of partition names to block devices.
     
@@ -73,7 +92,7 @@ def get_partition_mapping(dump_dir: Path) -> Dict[str, str]:
     print("Getting partition mapping...")
     
     # Get list of block devices by name
-    _, block_devices_by_name, _ = run_adb_command(["adb", "shell", "ls", "-la", "/dev/block/by-name/"], check=False)
+    _, block_devices_by_name, _ = run_adb_command(["adb", "shell", "ls", "-la", "/dev/block/by-name/"], check=False, adb_shell=adb_shell)
     save_to_file(dump_dir / "block_devices_by_name.txt", block_devices_by_name)
     
     # Parse the output to create a mapping
@@ -98,13 +117,77 @@ def get_partition_mapping(dump_dir: Path) -> Dict[str, str]:
     return partition_map
 
 
-def get_partition_sizes(dump_dir: Path, partition_map: Dict[str, str]) -> Dict[str, int]:
+# Probes every by-name partition in one round-trip, printing "name|size|header hex",
+# with UNREADABLE_HEADER in place of the header when the shell may not read it
+UNREADABLE_HEADER = "!"
+PROBE_SCRIPT = (
+    "for d in /dev/block/by-name/*; do "
+    "n=${d##*/}; "
+    "sz=$(blockdev --getsize64 \"$d\" 2>/dev/null || echo 'Permission denied'); "
+    "if [ -r \"$d\" ]; then "
+    "hdr=$(dd if=\"$d\" bs=512 count=1 2>/dev/null | xxd -p | tr -d '\\n'); "
+    f"else hdr='{UNREADABLE_HEADER}'; fi; "
+    "echo \"$n|$sz|$hdr\"; "
+    "done"
+)
+
+
+def probe_partitions(adb_shell: AdbShell) -> Dict[str, Tuple[str, Optional[bytes]]]:
+    """
+    Read the size and first 512 bytes of every partition with a single script.
+    
+    Args:
+        adb_shell: Persistent shell session for device commands
+    
+    Returns:
+        Dictionary mapping partition names to (blockdev size output, header bytes),
+        where the header is None if the partition could not be read
+    """
+    print("Probing partitions...")
+    _, probe_output, _ = run_adb_command(["adb", "shell", PROBE_SCRIPT], check=False, adb_shell=adb_shell)
+    
+    probes = {}
+    for line in probe_output.splitlines():
+        parts = line.strip().split("|")
+        if len(parts) != 3:
+            continue
+        name, size_output, header_hex = parts
+        if header_hex == UNREADABLE_HEADER:
+            header = None
+        else:
+            try:
+                header = bytes.fromhex(header_hex)
+            except ValueError:
+                header = b""
+        probes[name] = (size_output, header)
+    
+    return probes
+
+
+def format_hexdump(data: bytes, max_lines: int = 10) -> str:
+    """Format bytes like the first lines of `hexdump -C`."""
+    lines = []
+    for offset in range(0, min(len(data), max_lines * 16), 16):
+        chunk = data[offset:offset + 16]
+        hex_bytes = [f"{b:02x}" for b in chunk]
+        hex_part = " ".join(hex_bytes[:8]) + "  " + " ".join(hex_bytes[8:])
+        ascii_part = "".join(chr(b) if 32 <= b < 127 else "." for b in chunk)
+        lines.append(f"{offset:08x}  {hex_part:<48}  |{ascii_part}|")
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def get_partition_sizes(
+    dump_dir: Path,
+    partition_map: Dict[str, str],
+    probes: Dict[str, Tuple[str, Optional[bytes]]],
+) -> Dict[str, int]:
     """
     Get the size of each partition.
     
     Args:
         dump_dir: Directory to save the output
         partition_map: Mapping of partition names to block device paths
+        probes: Partition probe results from probe_partitions
     
     Returns:
         Dictionary mapping partition names to sizes in bytes
@@ -114,9 +197,8 @@ def get_partition_sizes(dump_dir: Path, partition_map: Dict[str, str]) -> Dict[s
     partition_sizes = {}
     size_content = []
     
-    for name, device in partition_map.items():
-        print(f"  Getting size of {name} ({device})...")
-        _, size_output, _ = run_adb_command(["adb", "shell", f"blockdev --getsize64 {device} 2>/dev/null || echo 'Permission denied'"], check=False)
+    for name in partition_map:
+        size_output = probes.get(name, ("", b""))[0]
         
         if size_output and not "Permission denied" in size_output and not "No such file or directory" in size_output:
             try:
@@ -135,13 +217,60 @@ def get_partition_sizes(dump_dir: Path, partition_map: Dict[str, str]) -> Dict[s
     return partition_sizes
 
 
-def get_partition_types(dump_dir: Path, partition_map: Dict[str, str]) -> Dict[str, str]:
+# Header signatures checked in order against the first 512 bytes of a partition
+HEADER_MAGICS = [
+    (b"Android", "Android filesystem"),
+    (b"ANDROID!", "Android boot image"),
+    (b"ELF", "ELF binary"),
+    (b"ustar", "tar archive"),
+    (b"hsqs", "SquashFS"),
+    (b"ext2", "ext filesystem"),
+    (b"ext3", "ext filesystem"),
+    (b"ext4", "ext filesystem"),
+]
+
+# Partition types implied by well-known partition names
+NAME_TYPES = {
+    "boot_a": "Android boot image",
+    "boot_b": "Android boot image",
+    "recovery_a": "Android recovery image",
+    "recovery_b": "Android recovery image",
+    "system_a": "Android filesystem",
+    "system_b": "Android filesystem",
+    "vendor_a": "Android filesystem",
+    "vendor_b": "Android filesystem",
+    "userdata": "User data (ext4)",
+    "metadata": "Metadata (ext4)",
+    "super": "Super (dynamic partitions)",
+    "vbmeta_a": "Verified Boot Metadata",
+    "vbmeta_b": "Verified Boot Metadata",
+    "vbmeta_system_a": "Verified Boot Metadata",
+    "vbmeta_system_b": "Verified Boot Metadata",
+    "dtbo_a": "Device Tree Blob Overlay",
+    "dtbo_b": "Device Tree Blob Overlay",
+    "tz_a": "TrustZone",
+    "tz_b": "TrustZone",
+    "modem_a": "Modem firmware",
+    "modem_b": "Modem firmware",
+    "bluetooth_a": "Bluetooth firmware",
+    "bluetooth_b": "Bluetooth firmware",
+    "dsp_a": "DSP firmware",
+    "dsp_b": "DSP firmware",
+}
+
+
+def get_partition_types(
+    dump_dir: Path,
+    partition_map: Dict[str, str],
+    probes: Dict[str, Tuple[str, Optional[bytes]]],
+) -> Dict[str, str]:
     """
     Attempt to determine the type of each partition.
     
     Args:
         dump_dir: Directory to save the output
         partition_map: Mapping of partition names to block device paths
+        probes: Partition probe results from probe_partitions
     
     Returns:
         Dictionary mapping partition names to partition types
@@ -155,67 +284,27 @@ def get_partition_types(dump_dir: Path, partition_map: Dict[str, str]) -> Dict[s
     partition_types = {}
     type_content = []
     
-    for name, device in partition_map.items():
-        print(f"  Determining type of {name} ({device})...")
-        
-        # Try to read the first 512 bytes to determine type
-        _, header_output, _ = run_adb_command(["adb", "shell", f"dd if={device} bs=512 count=1 2>/dev/null | hexdump -C | head -n 10"], check=False)
+    for name in partition_map:
+        # The first 512 bytes of the partition were read by the probe
+        header = probes.get(name, ("", b""))[1]
         
-        if "Permission denied" in header_output or "Operation not permitted" in header_output:
+        if header is None:
             partition_types[name] = "Unknown (permission denied)"
             type_content.append(f"{name}: Unknown (permission denied)")
-        elif not header_output:
+        elif not header:
             partition_types[name] = "Unknown (no data)"
             type_content.append(f"{name}: Unknown (no data)")
         else:
-            # Try to determine type based on header
-            partition_type = "Unknown"
-            
-            # Check for common partition types
-            if "Android" in header_output:
-                partition_type = "Android filesystem"
-            elif "ANDROID!" in header_output:
-                partition_type = "Android boot image"
-            elif "ELF" in header_output:
-                partition_type = "ELF binary"
-            elif "ustar" in header_output:
-                partition_type = "tar archive"
-            elif "hsqs" in header_output:
-                partition_type = "SquashFS"
-            elif "ext2" in header_output or "ext3" in header_output or "ext4" in header_output:
-                partition_type = "ext filesystem"
-            
-            # Special cases based on partition name
-            if name in ["boot_a", "boot_b"]:
-                partition_type = "Android boot image"
-            elif name in ["recovery_a", "recovery_b"]:
-                partition_type = "Android recovery image"
-            elif name in ["system_a", "system_b", "vendor_a", "vendor_b"]:
-                partition_type = "Android filesystem"
-            elif name in ["userdata"]:
-                partition_type = "User data (ext4)"
-            elif name in ["metadata"]:
-                partition_type = "Metadata (ext4)"
-            elif name in ["super"]:
-                partition_type = "Super (dynamic partitions)"
-            elif name in ["vbmeta_a", "vbmeta_b", "vbmeta_system_a", "vbmeta_system_b"]:
-                partition_type = "Verified Boot Metadata"
-            elif name in ["dtbo_a", "dtbo_b"]:
-                partition_type = "Device Tree Blob Overlay"
-            elif name in ["tz_a", "tz_b"]:
-                partition_type = "TrustZone"
-            elif name in ["modem_a", "modem_b"]:
-                partition_type = "Modem firmware"
-            elif name in ["bluetooth_a", "bluetooth_b"]:
-                partition_type = "Bluetooth firmware"
-            elif name in ["dsp_a", "dsp_b"]:
-                partition_type = "DSP firmware"
+            # Known partition names take precedence over the header contents
+            partition_type = NAME_TYPES.get(name) or next(
+                (label for magic, label in HEADER_MAGICS if magic in header), "Unknown"
+            )
             
             partition_types[name] = partition_type
             type_content.append(f"{name}: {partition_type}")
             
             # Save the header for reference
-            save_to_file(headers_dir / f"{name}_header.txt", header_output)
+            save_to_file(headers_dir / f"{name}_header.txt", format_hexdump(header))
     
     # Save the types
     save_to_file(dump_dir / "partition_types.txt", "\n".join(type_content))
@@ -223,9 +312,35 @@ def get_partition_types(dump_dir: Path, partition_map: Dict[str, str]) -> Dict[s
     return partition_types
 
 
-def get_bootloader_info(dump_dir: Path) -> None:
+# One `[key]: [value]` line of getprop output
+_PROP_RE = re.compile(r'^\[([^\]]+)\]: \[(.*)\]\s*$', re.MULTILINE)
+
+
+def parse_properties(properties: str) -> Dict[str, str]:
+    """
+    Parse the output of `getprop` into a dictionary.
+    
+    Args:
+        properties: Raw getprop output
+    
+    Returns:
+        Dictionary mapping property names to values
+    """
+    return dict(_PROP_RE.findall(properties))
+
+
+def filter_lines(text: str, pattern: str) -> str:
+    """Return the lines of text containing pattern, like `grep pattern`."""
+    return "".join(line for line in text.splitlines(keepends=True) if pattern in line)
+
+
+def get_bootloader_info(dump_dir: Path, all_properties: str) -> None:
     """
     Get detailed information about the bootloader.
+    
+    Args:
+        dump_dir: Directory to save the output
+        all_properties: Raw getprop output, fetched once for all lookups
     """
     print("Getting bootloader information...")
     
@@ -233,38 +348,41 @@ def get_bootloader_info(dump_dir: Path) -> None:
     bootloader_dir = dump_dir / "bootloader"
     bootloader_dir.mkdir(exist_ok=True)
     
+    properties = parse_properties(all_properties)
+    
     # Get bootloader status
-    _, bootloader_status, _ = run_adb_command(["adb", "shell", "getprop ro.boot.verifiedbootstate"], check=False)
-    save_to_file(bootloader_dir / "bootloader_state.txt", bootloader_status.strip())
+    save_to_file(bootloader_dir / "bootloader_state.txt", properties.get("ro.boot.verifiedbootstate", ""))
     
     # Get bootloader version
-    _, bootloader_version, _ = run_adb_command(["adb", "shell", "getprop ro.bootloader"], check=False)
-    save_to_file(bootloader_dir / "bootloader_version.txt", bootloader_version.strip())
+    save_to_file(bootloader_dir / "bootloader_version.txt", properties.get("ro.bootloader", ""))
     
     # Get secure boot status
-    _, secure_boot, _ = run_adb_command(["adb", "shell", "getprop ro.boot.secureboot"], check=False)
-    save_to_file(bootloader_dir / "secure_boot.txt", secure_boot.strip())
+    save_to_file(bootloader_dir / "secure_boot.txt", properties.get("ro.boot.secureboot", ""))
     
     # Get verified boot status
-    _, verified_boot, _ = run_adb_command(["adb", "shell", "getprop ro.boot.verifiedboot"], check=False)
-    save_to_file(bootloader_dir / "verified_boot.txt", verified_boot.strip())
+    save_to_file(bootloader_dir / "verified_boot.txt", properties.get("ro.boot.verifiedboot", ""))
     
     # Get boot slot information
-    _, boot_slot, _ = run_adb_command(["adb", "shell", "getprop ro.boot.slot_suffix"], check=False)
-    save_to_file(bootloader_dir / "boot_slot.txt", boot_slot.strip())
+    save_to_file(bootloader_dir / "boot_slot.txt", properties.get("ro.boot.slot_suffix", ""))
     
     # Get all bootloader-related properties
-    _, boot_props, _ = run_adb_command(["adb", "shell", "getprop | grep boot"], check=False)
-    save_to_file(bootloader_dir / "boot_properties.txt", boot_props)
+    save_to_file(bootloader_dir / "boot_properties.txt", filter_lines(all_properties, "boot"))
 
 
-def get_partition_contents(dump_dir: Path, partition_map: Dict[str, str]) -> None:
+def get_partition_contents(
+    dump_dir: Path,
+    adb_shell: AdbShell,
+    partition_map: Dict[str, str],
+    all_properties: str,
+) -> None:
     """
     Attempt to get contents of important partitions using alternative methods.
     
     Args:
         dump_dir: Directory to save the output
+        adb_shell: Persistent shell session for device commands
         partition_map: Mapping of partition names to block device paths
+        all_properties: Raw getprop output, fetched once for all lookups
     """
     print("Attempting to get partition contents using alternative methods...")
     
@@ -275,34 +393,33 @@ def get_partition_contents(dump_dir: Path, partition_map: Dict[str, str]) -> Non
     # Try to get boot image information
     if "boot_a" in partition_map:
         print("  Analyzing boot image...")
-        _, boot_info, _ = run_adb_command(["adb", "shell", "cat /proc/cmdline"], check=False)
+        _, boot_info, _ = run_adb_command(["adb", "shell", "cat /proc/cmdline"], check=False, adb_shell=adb_shell)
         save_to_file(contents_dir / "boot_cmdline.txt", boot_info)
     
     # Try to get dtbo information
     if "dtbo_a" in partition_map:
         print("  Analyzing dtbo image...")
-        _, dtbo_info, _ = run_adb_command(["adb", "shell", "ls -la /proc/device-tree/"], check=False)
+        _, dtbo_info, _ = run_adb_command(["adb", "shell", "ls -la /proc/device-tree/"], check=False, adb_shell=adb_shell)
         save_to_file(contents_dir / "device_tree_listing.txt", dtbo_info)
     
     # Try to get vbmeta information
     if "vbmeta_a" in partition_map:
         print("  Analyzing vbmeta image...")
-        _, vbmeta_info, _ = run_adb_command(["adb", "shell", "getprop | grep avb"], check=False)
-        save_to_file(contents_dir / "vbmeta_properties.txt", vbmeta_info)
+        save_to_file(contents_dir / "vbmeta_properties.txt", filter_lines(all_properties, "avb"))
     
     # Try to get fstab information
     print("  Getting fstab information...")
-    _, fstab, _ = run_adb_command(["adb", "shell", "cat /etc/fstab*"], check=False)
+    _, fstab, _ = run_adb_command(["adb", "shell", "cat /etc/fstab*"], check=False, adb_shell=adb_shell)
     save_to_file(contents_dir / "fstab.txt", fstab)
     
     # Try to get mount information
     print("  Getting mount information...")
-    _, mounts, _ = run_adb_command(["adb", "shell", "cat /proc/mounts"], check=False)
+    _, mounts, _ = run_adb_command(["adb", "shell", "cat /proc/mounts"], check=False, adb_shell=adb_shell)
     save_to_file(contents_dir / "mounts.txt", mounts)
     
     # Try to get partition table information
     print("  Getting partition table information...")
-    _, partition_table, _ = run_adb_command(["adb", "shell", "cat /proc/partitions"], check=False)
+    _, partition_table, _ = run_adb_command(["adb", "shell", "cat /proc/partitions"], check=False, adb_shell=adb_shell)
     save_to_file(contents_dir / "partitions.txt", partition_table)
 
 
@@ -314,61 +431,70 @@ def main():
     # Set up the dump directory
     dump_dir = setup_dump_directory()
     
-    # Create subdirectories
-    (dump_dir / "headers").mkdir(exist_ok=True)
-    
-    # Get partition mapping
-    partition_map = get_partition_mapping(dump_dir)
-    
-    # Get partition sizes
-    partition_sizes = get_partition_sizes(dump_dir, partition_map)
-    
-    # Get partition types
-    partition_types = get_partition_types(dump_dir, partition_map)
-    
-    # Get bootloader information
-    get_bootloader_info(dump_dir)
-    
-    # Get partition contents where possible
-    get_partition_contents(dump_dir, partition_map)
-    
-    # Generate summary
-    summary = []
-    summary.append(f"Partition Information Summary for RanNeo X2 AR Glasses")
-    summary.append(f"=======================================================")
-    summary.append(f"Total partitions identified: {len(partition_map)}")
-    summary.append("")
-    summary.append("Key Bootloader Partitions:")
-    
-    bootloader_partitions = ["xbl_a", "xbl_b", "abl_a", "abl_b", "tz_a", "tz_b", 
-                            "boot_a", "boot_b", "recovery_a", "recovery_b", 
-                            "dtbo_a", "dtbo_b", "vbmeta_a", "vbmeta_b"]
-    
-    for name in bootloader_partitions:
-        if name in partition_map:
-            size_str = f"{partition_sizes.get(name, 0) / (1024 * 1024):.2f} MB" if name in partition_sizes else "Unknown"
-            type_str = partition_types.get(name, "Unknown")
-            summary.append(f"  {name}: {partition_map[name]} ({size_str}) - {type_str}")
-    
-    summary.append("")
-    summary.append("Key System Partitions:")
-    
-    system_partitions = ["super", "userdata", "metadata", "persist"]
-    
-    for name in system_partitions:
-        if name in partition_map:
-            size_str = f"{partition_sizes.get(name, 0) / (1024 * 1024):.2f} MB" if name in partition_sizes else "Unknown"
-            type_str = partition_types.get(name, "Unknown")
-            summary.append(f"  {name}: {partition_map[name]} ({size_str}) - {type_str}")
-    
-    summary.append("")
-    summary.append("Note: Direct partition dumps were not possible due to permission restrictions.")
-    summary.append("To dump raw partition images, you would need:")
-    summary.append("1. Root access")
-    summary.append("2. An unlocked bootloader")
-    summary.append("3. Custom recovery (like TWRP)")
-    
-    save_to_file(dump_dir / "summary.txt", "\n".join(summary))
+    try:
+        # Run every probe over a single persistent adb shell
+        with AdbShell() as adb_shell:
+            # Get partition mapping
+            partition_map = get_partition_mapping(dump_dir, adb_shell)
+            
+            # Read every partition's size and header in one go
+            probes = probe_partitions(adb_shell)
+            
+            # Get partition sizes
+            partition_sizes = get_partition_sizes(dump_dir, partition_map, probes)
+            
+            # Get partition types
+            partition_types = get_partition_types(dump_dir, partition_map, probes)
+            
+            # Fetch all properties once for the bootloader and vbmeta lookups
+            _, all_properties, _ = run_adb_command(["adb", "shell", "getprop"], check=False, adb_shell=adb_shell)
+            
+            # Get bootloader information
+            get_bootloader_info(dump_dir, all_properties)
+            
+            # Get partition contents where possible
+            get_partition_contents(dump_dir, adb_shell, partition_map, all_properties)
+        
+        # Generate summary
+        summary = []
+        summary.append(f"Partition Information Summary for RanNeo X2 AR Glasses")
+        summary.append(f"=======================================================")
+        summary.append(f"Total partitions identified: {len(partition_map)}")
+        summary.append("")
+        summary.append("Key Bootloader Partitions:")
+        
+        bootloader_partitions = ["xbl_a", "xbl_b", "abl_a", "abl_b", "tz_a", "tz_b", 
+                                "boot_a", "boot_b", "recovery_a", "recovery_b", 
+                                "dtbo_a", "dtbo_b", "vbmeta_a", "vbmeta_b"]
+        
+        for name in bootloader_partitions:
+            if name in partition_map:
+                size_str = f"{partition_sizes.get(name, 0) / (1024 * 1024):.2f} MB" if name in partition_sizes else "Unknown"
+                type_str = partition_types.get(name, "Unknown")
+                summary.append(f"  {name}: {partition_map[name]} ({size_str}) - {type_str}")
+        
+        summary.append("")
+        summary.append("Key System Partitions:")
+        
+        system_partitions = ["super", "userdata", "metadata", "persist"]
+        
+        for name in system_partitions:
+            if name in partition_map:
+                size_str = f"{partition_sizes.get(name, 0) / (1024 * 1024):.2f} MB" if name in partition_sizes else "Unknown"
+                type_str = partition_types.get(name, "Unknown")
+                summary.append(f"  {name}: {partition_map[name]} ({size_str}) - {type_str}")
+        
+        summary.append("")
+        summary.append("Note: Direct partition dumps were not possible due to permission restrictions.")
+        summary.append("To dump raw partition images, you would need:")
+        summary.append("1. Root access")
+        summary.append("2. An unlocked bootloader")
+        summary.append("3. Custom recovery (like TWRP)")
+        
+        save_to_file(dump_dir / "summary.txt", "\n".join(summary))
+    finally:
+        # Make sure every queued file reaches the disk, even if a probe failed
+        dump_writer.close()
     
     print(f"\nPartition information gathering completed! All data saved to: {dump_dir}")
     print(f"See {dump_dir}/summary.txt for a summary of the findings.")
@@ -9,10 +9,20 @@ from pathlib import Path
 
 import settings
 
+# Every PNG file starts with this signature
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+# Directories already created by this process, so repeated captures skip the mkdir
+_existing_directories = set()
+
 
 def ensure_directory_exists(directory: Path) -> None:
     """Ensure that the specified directory exists."""
+    if directory in _existing_directories:
+        return
     directory.mkdir(parents=True, exist_ok=True)
+    _existing_directories.add(directory)
 
 
 def get_date_time_paths() -> tuple[str, str]:
@@ -39,50 +49,56 @@ def copy_to_tmp_dir(screenshot_path: Path) -> Path:
     # Create a path in the temporary directory with the same filename
     tmp_path = settings.TMP_SCREENSHOTS_DIR / screenshot_path.name
     
-    # Copy the file
-    shutil.copy2(screenshot_path, tmp_path)
+    # Hard-link the file, copying only when the directories are on different filesystems
+    if tmp_path.exists():
+        tmp_path.unlink()
+    try:
+        os.link(screenshot_path, tmp_path)
+    except OSError:
+        shutil.copy2(screenshot_path, tmp_path)
     print(f"Screenshot copied to: {tmp_path}")
     
     return tmp_path
 
 
-def capture_screenshot(output_path: Path = None) -> Path:
+def capture_screenshot(output_path: Path = None, skip_mkdir: bool = False) -> Path:
     """
     Capture a screenshot from the RanNeo X2 AR glasses and save it to the specified path.
     
     Args:
         output_path: Optional path where the screenshot should be saved.
                     If not provided, it will be saved to the default location.
+        skip_mkdir: Set when the caller knows the parent directory of
+                    output_path already exists.
     
     Returns:
         Path to the saved screenshot.
     """
-    date_str, time_str = get_date_time_paths()
-    
     # If no output path is provided, use the default location
     if output_path is None:
-        screenshot_dir = settings.SCREENSHOTS_DIR / date_str
-        ensure_directory_exists(screenshot_dir)
-        output_path = screenshot_dir / f"{time_str}.png"
+        date_str, time_str = get_date_time_paths()
+        output_path = settings.SCREENSHOTS_DIR / date_str / f"{time_str}.png"
     
     # Ensure the parent directory exists
-    ensure_directory_exists(output_path.parent)
+    if not skip_mkdir:
+        ensure_directory_exists(output_path.parent)
     
     # Capture the screenshot
     try:
-        # Take screenshot on the device
-        subprocess.run(
-            ["adb", "shell", "screencap", "-p", settings.SCREENSHOT_REMOTE_PATH],
-            check=True,
-            capture_output=True,
-        )
+        # Stream the PNG straight from the device instead of staging it on /sdcard
+        command = ["adb", "exec-out", "screencap", "-p"]
+        with open(os.fspath(output_path), "wb") as f:
+            result = subprocess.run(command, stdout=f, stderr=subprocess.PIPE)
         
-        # Pull the screenshot to the local machine
-        subprocess.run(
-            ["adb", "pull", settings.SCREENSHOT_REMOTE_PATH, str(output_path)],
-            check=True,
-            capture_output=True,
-        )
+        # exec-out merges the device's stderr into stdout, so check what arrived
+        with open(output_path, "rb") as f:
+            header = f.read(len(PNG_SIGNATURE))
+        if result.returncode != 0 or header != PNG_SIGNATURE:
+            output = output_path.read_bytes()
+            output_path.unlink()
+            raise subprocess.CalledProcessError(
+                result.returncode or 1, command, output=output, stderr=result.stderr
+            )
         
         print(f"Screenshot saved to: {output_path}")
         
@@ -93,6 +109,6 @@ def capture_screenshot(output_path: Path = None) -> Path:
     
     except subprocess.CalledProcessError as e:
         print(f"Error capturing screenshot: {e}")
-        print(f"Command output: {e.stdout.decode()}")
-        print(f"Command error: {e.stderr.decode()}")
+        print(f"Command output: {e.stdout.decode(errors='replace')}")
+        print(f"Command error: {e.stderr.decode(errors='replace')}")
         raise
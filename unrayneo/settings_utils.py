@@ -30,7 +30,7 @@ def open_settings(page: Optional[SettingsPage] = SettingsPage.MAIN) -> None:
         subprocess.CalledProcessError: If the ADB command fails.
     """
     try:
-        if page == SettingsPage.MAIN:
+        if page is SettingsPage.MAIN:
             # Open main settings using explicit component name
             command = ["adb", "shell", "am", "start", "-n", page.value]
         else:
@@ -45,7 +45,7 @@ def open_settings(page: Optional[SettingsPage] = SettingsPage.MAIN) -> None:
         )
         
         print(f"Opened Android settings: {page.name}")
-        if "Starting" in result.stdout:
+        if result.stdout.startswith("Starting"):
             print(f"Command output: {result.stdout.strip()}")
         
     except subprocess.CalledProcessError as e:
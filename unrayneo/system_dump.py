@@ -4,46 +4,89 @@ System Dump Utility for RanNeo X2 AR Glasses
 This script performs a comprehensive dump of system information from RanNeo X2 AR glasses.
 All data is saved to the secret directory to protect potentially sensitive information.
 """
+import gzip
 import os
+import re
+import shlex
 import subprocess
 import sys
-import time
+import tarfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 import shutil
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Set, Tuple, Union
 
 # Import project settings
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 import settings
+from unrayneo.adb_shell import MAX_BATCH_SCRIPT, MAX_EXEC_COMMAND, AdbShell, adb_concurrency, start_adb_server
+from unrayneo.dump_writer import DumpWriter
 
 # Create timestamp for the dump directory
 TIMESTAMP = datetime.now().strftime("%Y%m%d_%H%M%S")
 DUMP_DIR = settings.SECRET_DIR / f"system_dump_{TIMESTAMP}"
 
+# Small text outputs are collected into this archive; APKs, partition images,
+# logs and the device tree tarball stay separate files next to it
+DUMP_ARCHIVE = DUMP_DIR / "dump.tar"
+
+# Writes dump files in the background while the next adb command runs
+dump_writer = DumpWriter()
+
+# APKs pulled by earlier dumps, as <package>_<size>.apk, so reruns can skip them
+APK_CACHE_DIR = settings.SECRET_DIR / "apk_cache"
+
+# Number of dump groups run in parallel, each over its own adb shell
+MAX_WORKERS = adb_concurrency()
+
+# GPU identity for hardware/gpu_info.txt: the EGL driver and GLES version
+# properties plus the Adreno (kgsl) model and load
+GPU_INFO_COMMAND = (
+    'echo "EGL: $(getprop ro.hardware.egl)"; '
+    'echo "OpenGL ES version: $(getprop ro.opengles.version)"; '
+    'echo "GPU model: $(cat /sys/class/kgsl/kgsl-3d0/gpu_model 2>/dev/null)"; '
+    'echo "GPU busy: $(cat /sys/class/kgsl/kgsl-3d0/gpu_busy_percentage 2>/dev/null)"'
+)
+
+# The full SurfaceFlinger dump is megabytes of per-layer state, so it is only
+# taken when UNRAYNEO_FULL_SURFACEFLINGER=1 is set
+FULL_SURFACEFLINGER_DUMP = os.environ.get("UNRAYNEO_FULL_SURFACEFLINGER") == "1"
+
 
 def setup_dump_directory() -> Path:
     """Create and return the dump directory path."""
     dump_dir = DUMP_DIR
-    dump_dir.mkdir(parents=True, exist_ok=True)
     
-    # Create subdirectories
-    (dump_dir / "partitions").mkdir(exist_ok=True)
-    (dump_dir / "props").mkdir(exist_ok=True)
-    (dump_dir / "apks").mkdir(exist_ok=True)
-    (dump_dir / "logs").mkdir(exist_ok=True)
-    (dump_dir / "bootloader").mkdir(exist_ok=True)
+    # Create subdirectories for the files that are not archived, along with
+    # the dump directory itself
+    for subdir in ("partitions/images", "apks/files", "logs"):
+        os.makedirs(dump_dir / subdir, exist_ok=True)
     
     return dump_dir
 
 
-def run_adb_command(command: List[str], check: bool = True) -> Tuple[int, str, str]:
+def run_adb_command(
+    command: List[str],
+    check: bool = True,
+    adb_shell: Optional[AdbShell] = None,
+    stream_to: Optional[Path] = None,
+    binary: bool = False,
+) -> Tuple[int, Union[str, bytes], Union[str, bytes]]:
     """
     Run an ADB command and return the exit code, stdout, and stderr.
     
     Args:
         command: The ADB command to run as a list of strings.
         check: Whether to raise an exception if the command fails.
+        adb_shell: Optional persistent shell session. `adb shell ...` commands
+                   are sent through it instead of spawning a new adb client.
+        stream_to: Optional file to write stdout to directly, for large
+                   outputs that are only saved. The returned stdout is empty.
+                   A path ending in .gz is gzip-compressed while it is written.
+        binary: Return stdout/stderr as bytes, skipping the decode for output
+                that is only saved.
     
     Returns:
         Tuple of (exit_code, stdout, stderr)
@@ -51,11 +94,43 @@ def run_adb_command(command: List[str], check: bool = True) -> Tuple[int, str, s
     Raises:
         subprocess.CalledProcessError: If check is True and the command fails.
     """
+    if stream_to is not None and stream_to.suffix == ".gz":
+        # Compress on the fly at the fastest level, which keeps up with adb
+        # and still shrinks text output several times
+        process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        with gzip.open(stream_to, "wb", compresslevel=1) as f:
+            shutil.copyfileobj(process.stdout, f, 1024 * 1024)
+        stderr = process.stderr.read().decode("utf-8", "replace")
+        returncode = process.wait()
+        if check and returncode != 0:
+            e = subprocess.CalledProcessError(returncode, command)
+            print(f"Error running command {' '.join(command)}: {e}")
+        return returncode, "", stderr
+    
+    if stream_to is not None:
+        # Let adb write straight into the file instead of piping through Python.
+        # Without a terminal on stdin, adb shell skips the pty and its CRLF
+        # translation, so the bytes land on disk as the device wrote them.
+        with open(stream_to, "wb") as f:
+            result = subprocess.run(command, stdin=subprocess.DEVNULL, stdout=f, stderr=subprocess.PIPE, text=True)
+        if check and result.returncode != 0:
+            e = subprocess.CalledProcessError(result.returncode, command)
+            print(f"Error running command {' '.join(command)}: {e}")
+        return result.returncode, "", result.stderr
+    
+    if adb_shell is not None and command[:2] == ["adb", "shell"] and len(command) > 2:
+        # adb joins the shell arguments with spaces, so do the same here
+        returncode, stdout, stderr = adb_shell.run(" ".join(command[2:]), binary=binary)
+        if check and returncode != 0:
+            e = subprocess.CalledProcessError(returncode, command)
+            print(f"Error running command {' '.join(command)}: {e}")
+        return returncode, stdout, stderr
+    
     try:
         result = subprocess.run(
             command,
             capture_output=True,
-            text=True,
+            text=not binary,
             check=check
         )
         return result.returncode, result.stdout, result.stderr
@@ -64,34 +139,192 @@ def run_adb_command(command: List[str], check: bool = True) -> Tuple[int, str, s
         return e.returncode, e.stdout, e.stderr
 
 
-def save_to_file(path: Path, content: str) -> None:
-    """Save content to a file."""
-    with open(path, 'w', encoding='utf-8') as f:
-        f.write(content)
+# Outputs of read-only device commands, shared by every dump that runs the
+# same command. Values are futures, so a command already running for one
+# dump group is waited on instead of being sent again. Outputs are kept as
+# raw bytes and only decoded for callers that parse them.
+_command_cache: Dict[str, "Future[Tuple[int, bytes]]"] = {}
+_command_cache_lock = threading.Lock()
 
 
-def dump_device_info(dump_dir: Path) -> None:
+def run_cached_batch(
+    adb_shell: AdbShell,
+    commands: Dict[str, str],
+    binary: bool = False,
+) -> Dict[str, Tuple[int, Union[str, bytes]]]:
+    """
+    Run read-only commands like AdbShell.run_batch, reusing earlier results.
+    
+    Only commands no dump has run yet are sent to the device, together in
+    one batch. Use this for commands whose output several dumps save.
+    
+    Args:
+        adb_shell: Persistent shell session
+        commands: Mapping of caller-chosen keys to shell command lines
+        binary: Return each stdout as raw bytes, skipping the decode for
+                output that is only saved
+    
+    Returns:
+        Dictionary mapping each key to (exit_code, stdout)
+    """
+    owned: Dict[str, "Future[Tuple[int, bytes]]"] = {}
+    futures = {}
+    with _command_cache_lock:
+        for key, command in commands.items():
+            future = _command_cache.get(command)
+            if future is None:
+                future = owned[command] = _command_cache[command] = Future()
+            futures[key] = future
+    
+    if owned:
+        try:
+            results = adb_shell.run_batch({command: command for command in owned}, binary=True)
+        except BaseException as e:
+            for future in owned.values():
+                future.set_exception(e)
+            raise
+        for command, future in owned.items():
+            future.set_result(results[command])
+    
+    results = {key: future.result() for key, future in futures.items()}
+    if binary:
+        return results
+    return {key: (returncode, stdout.decode("utf-8", "replace")) for key, (returncode, stdout) in results.items()}
+
+
+# Matches one `[name]: [value]` line of getprop output
+_PROP_RE = re.compile(r'^\[([^\]]+)\]: \[(.*)\]\s*$', re.MULTILINE)
+
+# Matches one `package:<path>=<name>` line of `pm list packages -f`; the path
+# itself may contain '=', so it extends to the last one
+_PKG_PATH_RE = re.compile(r'^package:(\S+)=(\S+?)\s*$', re.MULTILINE)
+
+# Matches the value of one `package:<value>` line of `pm list packages`/`pm path`
+_PKG_VALUE_RE = re.compile(r'^package:(\S+)', re.MULTILINE)
+
+# Matches the header of one package's entry in `dumpsys package packages`
+_PKG_DUMP_HEADER_RE = re.compile(r'^  Package \[([^\]]+)\]', re.MULTILINE)
+
+# Matches package names from the Chinese vendor, case-insensitively
+_CHINESE_RE = re.compile(r'com\.ffalcon|com\.leiniao|com\.zhiliaoapp|rayneo', re.IGNORECASE)
+
+
+def parse_properties(properties: str) -> Dict[str, str]:
+    """
+    Parse the output of `getprop` into a dictionary.
+    
+    Args:
+        properties: Raw getprop output
+    
+    Returns:
+        Dictionary mapping property names to values
+    """
+    return dict(_PROP_RE.findall(properties))
+
+
+def dump_package_entries(adb_shell: AdbShell) -> Dict[str, str]:
+    """
+    Fetch every package's dumpsys entry with a single `dumpsys package packages`.
+    
+    The output is split at the package headers of its "Packages:" section,
+    which ends at the first unindented line. The dump is fetched through
+    run_cached_batch, so every caller shares one device call.
+    
+    Returns:
+        Dictionary mapping package names to their dumpsys entry
+    """
+    _, output = run_cached_batch(adb_shell, {"packages": "dumpsys package packages"})["packages"]
+    
+    section_start = re.search(r'^Packages:$', output, re.MULTILINE)
+    if section_start is None:
+        return {}
+    section_end = re.compile(r'^\S', re.MULTILINE).search(output, section_start.end() + 1)
+    section = output[section_start.end():section_end.start() if section_end else None]
+    
+    headers = list(_PKG_DUMP_HEADER_RE.finditer(section))
+    entries = {}
+    for index, header in enumerate(headers):
+        end = headers[index + 1].start() if index + 1 < len(headers) else len(section)
+        entries[header.group(1)] = section[header.start():end]
+    return entries
+
+
+def filter_properties(prop_map: Dict[str, str], keyword: str) -> str:
+    """
+    Select the properties mentioning a keyword, like `getprop | grep <keyword>`.
+    
+    Args:
+        prop_map: Parsed getprop output
+        keyword: Text to look for in the property names and values
+    
+    Returns:
+        Matching properties in getprop's `[name]: [value]` format
+    """
+    lines = (f"[{name}]: [{value}]\n" for name, value in prop_map.items())
+    return "".join(line for line in lines if keyword in line)
+
+
+def grep_lines(text: str, pattern: str, after: int = 0, ignore_case: bool = False) -> str:
+    """
+    Select matching lines and the lines after them, like `grep [-i] -A <after>`.
+    
+    Non-adjacent groups are separated by a `--` line, as grep does.
+    
+    Args:
+        text: Text to search
+        pattern: Regular expression to look for
+        after: Number of lines to keep after each match
+        ignore_case: Match case-insensitively
+    
+    Returns:
+        The selected lines
+    """
+    regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+    lines = text.splitlines(keepends=True)
+    selected = []
+    last = -1
+    for index, line in enumerate(lines):
+        if not regex.search(line):
+            continue
+        start = max(index, last + 1)
+        if selected and start > last + 1:
+            selected.append("--\n")
+        end = min(len(lines), index + after + 1)
+        selected.extend(lines[start:end])
+        last = max(last, end - 1)
+    return "".join(selected)
+
+
+def save_to_file(path: Path, content: Union[str, bytes]) -> None:
+    """Queue text or raw bytes to be added to the dump archive by the background writer."""
+    dump_writer.write(path, content)
+
+
+def dump_device_info(dump_dir: Path, adb_shell: AdbShell) -> Dict[str, str]:
     """
     Dump basic device information.
+    
+    Returns the parsed getprop output so later dumps can look up properties
+    without asking the device again.
     """
     print("Dumping device information...")
     
     # Get build properties
-    _, props, _ = run_adb_command(["adb", "shell", "getprop"])
+    _, props, _ = run_adb_command(["adb", "shell", "getprop"], adb_shell=adb_shell)
     save_to_file(dump_dir / "props" / "build_props.txt", props)
+    prop_map = parse_properties(props)
     
-    # Get system information
+    # Get system information, all in one round-trip
     commands = {
-        "kernel_version.txt": ["adb", "shell", "uname", "-a"],
-        "cpu_info.txt": ["adb", "shell", "cat", "/proc/cpuinfo"],
-        "memory_info.txt": ["adb", "shell", "cat", "/proc/meminfo"],
-        "disk_usage.txt": ["adb", "shell", "df", "-h"],
-        "mount_points.txt": ["adb", "shell", "mount"],
-        "device_features.txt": ["adb", "shell", "pm", "list", "features"]
+        "kernel_version.txt": "uname -a",
+        "cpu_info.txt": "cat /proc/cpuinfo",
+        "memory_info.txt": "cat /proc/meminfo",
+        "disk_usage.txt": "df -h",
+        "mount_points.txt": "mount",
+        "device_features.txt": "pm list features",
     }
     
-    for filename, command in commands.items():
-        _, output, _ = run_adb_command(command)
+    for filename, (_, output) in run_cached_batch(adb_shell, commands, binary=True).items():
         save_to_file(dump_dir / "props" / filename, output)
     
     # Dump specific important props
@@ -112,311 +345,429 @@ def dump_device_info(dump_dir: Path) -> None:
         "sys.oem_unlock_allowed"
     ]
     
-    prop_details = {}
-    for prop in important_props:
-        _, output, _ = run_adb_command(["adb", "shell", "getprop", prop])
-        prop_details[prop] = output.strip()
+    prop_details = {prop: prop_map.get(prop, "") for prop in important_props}
     
-    prop_output = "\n".join([f"{k}: {v}" for k, v in prop_details.items()])
+    prop_output = "\n".join(f"{k}: {v}" for k, v in prop_details.items())
     save_to_file(dump_dir / "props" / "important_props.txt", prop_output)
+    
+    return prop_map
 
 
-def dump_partition_info(dump_dir: Path) -> None:
+def dump_partition_info(dump_dir: Path, adb_shell: AdbShell) -> None:
     """
     Dump partition information.
     """
     print("Dumping partition information...")
     
-    # Get partition list
-    _, partitions, _ = run_adb_command(["adb", "shell", "ls", "-la", "/dev/block/platform"])
-    save_to_file(dump_dir / "partitions" / "block_devices.txt", partitions)
-    
-    # Get partition table if available
-    _, partition_table, _ = run_adb_command(
-        ["adb", "shell", "cat", "/proc/partitions"], 
-        check=False
-    )
-    save_to_file(dump_dir / "partitions" / "proc_partitions.txt", partition_table)
-    
-    # Attempt to get more detailed partition info
+    # Partition list, partition table and the more detailed partition info,
+    # all in one round-trip
     commands = {
-        "mounts.txt": ["adb", "shell", "cat", "/proc/mounts"],
-        "fstab.txt": ["adb", "shell", "find", "/", "-name", "fstab*", "-exec", "cat", "{}", ";", "2>/dev/null"],
+        "block_devices.txt": "ls -la /dev/block/platform",
+        "proc_partitions.txt": "cat /proc/partitions",
+        "mounts.txt": "cat /proc/mounts",
+        "fstab.txt": "find / -name 'fstab*' -exec cat {} \\; 2>/dev/null",
     }
     
-    for filename, command in commands.items():
-        _, output, _ = run_adb_command(command, check=False)
+    for filename, (_, output) in adb_shell.run_batch(commands, binary=True).items():
         save_to_file(dump_dir / "partitions" / filename, output)
 
 
-def dump_bootloader_info(dump_dir: Path) -> None:
+def dump_bootloader_info(dump_dir: Path, adb_shell: AdbShell, prop_map: Dict[str, str]) -> None:
     """
     Dump comprehensive bootloader information.
+    
+    Properties are looked up in prop_map, the parsed getprop output from
+    dump_device_info.
     """
     print("Dumping bootloader information...")
     
-    # Create bootloader directory
     bootloader_dir = dump_dir / "bootloader"
-    bootloader_dir.mkdir(exist_ok=True)
     
     # Get bootloader status
-    _, bootloader_status, _ = run_adb_command(["adb", "shell", "getprop", "ro.boot.flash.locked"], check=False)
-    _, oem_unlock_allowed, _ = run_adb_command(["adb", "shell", "getprop", "sys.oem_unlock_allowed"], check=False)
+    bootloader_status = prop_map.get("ro.boot.flash.locked", "")
+    oem_unlock_allowed = prop_map.get("sys.oem_unlock_allowed", "")
     
     bootloader_info = f"Bootloader locked: {bootloader_status.strip()}\nOEM unlock allowed: {oem_unlock_allowed.strip()}"
     save_to_file(bootloader_dir / "status.txt", bootloader_info)
     
     # Get boot info
-    _, boot_slots, _ = run_adb_command(["adb", "shell", "getprop", "ro.boot.slot_suffix"], check=False)
+    boot_slots = prop_map.get("ro.boot.slot_suffix", "")
     save_to_file(bootloader_dir / "boot_slot.txt", f"Current boot slot: {boot_slots.strip()}")
     
     # Get verified boot state
-    _, verified_boot, _ = run_adb_command(["adb", "shell", "getprop", "ro.boot.verifiedbootstate"], check=False)
+    verified_boot = prop_map.get("ro.boot.verifiedbootstate", "")
     save_to_file(bootloader_dir / "verified_boot.txt", f"Verified boot state: {verified_boot.strip()}")
     
-    # Dump all boot-related properties
-    _, boot_props, _ = run_adb_command(["adb", "shell", "getprop", "|", "grep", "boot"])
-    save_to_file(bootloader_dir / "boot_properties.txt", boot_props)
-    
-    # Dump all secure boot related properties
-    _, secure_boot_props, _ = run_adb_command(["adb", "shell", "getprop", "|", "grep", "secure"])
-    save_to_file(bootloader_dir / "secure_boot_properties.txt", secure_boot_props)
-    
     # Try to dump bootloader version
-    _, bootloader_version, _ = run_adb_command(["adb", "shell", "getprop", "ro.bootloader"], check=False)
+    bootloader_version = prop_map.get("ro.bootloader", "")
     save_to_file(bootloader_dir / "bootloader_version.txt", f"Bootloader version: {bootloader_version.strip()}")
     
-    # Try to dump dtbo info
-    _, dtbo_info, _ = run_adb_command(["adb", "shell", "ls", "-la", "/dev/block/by-name/dtbo"], check=False)
-    save_to_file(bootloader_dir / "dtbo_info.txt", dtbo_info)
+    # Dump all boot-related and secure boot related properties
+    save_to_file(bootloader_dir / "boot_properties.txt", filter_properties(prop_map, "boot"))
+    save_to_file(bootloader_dir / "secure_boot_properties.txt", filter_properties(prop_map, "secure"))
+    
+    # Dtbo and vbmeta info in one round-trip
+    commands = {
+        "dtbo_info.txt": "ls -la /dev/block/by-name/dtbo",
+        "vbmeta_info.txt": "ls -la /dev/block/by-name/vbmeta",
+    }
     
-    # Try to dump vbmeta info
-    _, vbmeta_info, _ = run_adb_command(["adb", "shell", "ls", "-la", "/dev/block/by-name/vbmeta"], check=False)
-    save_to_file(bootloader_dir / "vbmeta_info.txt", vbmeta_info)
+    for filename, (_, output) in adb_shell.run_batch(commands, binary=True).items():
+        save_to_file(bootloader_dir / filename, output)
 
 
-def dump_installed_packages(dump_dir: Path) -> None:
+def collect_package_index(dump_dir: Path, adb_shell: AdbShell) -> Dict[str, Any]:
     """
-    Dump information about installed packages.
-    """
-    print("Dumping installed package information...")
+    List the installed packages once for every dump that needs them.
     
-    # Get list of all packages
-    _, packages, _ = run_adb_command(["adb", "shell", "pm", "list", "packages", "-f"])
-    save_to_file(dump_dir / "apks" / "package_list.txt", packages)
+    The full, system and third-party package lists are fetched in one
+    round-trip and saved to apks/*.txt.
+    
+    Returns:
+        Dictionary with the package names ("all"), their APK paths ("paths"),
+        and the system ("system") and third-party ("third_party") package names
+    """
+    print("Listing installed packages...")
+    
+    listings = adb_shell.run_batch({
+        "package_list.txt": "pm list packages -f",
+        "system_packages.txt": "pm list packages -s",
+        "third_party_packages.txt": "pm list packages -3",
+    })
+    for filename, (_, output) in listings.items():
+        save_to_file(dump_dir / "apks" / filename, output)
+    
+    package_paths = {
+        package: path for path, package in _PKG_PATH_RE.findall(listings["package_list.txt"][1])
+    }
     
-    # Get list of system packages
-    _, system_packages, _ = run_adb_command(["adb", "shell", "pm", "list", "packages", "-s"])
-    save_to_file(dump_dir / "apks" / "system_packages.txt", system_packages)
+    return {
+        "all": list(package_paths),
+        "paths": package_paths,
+        "system": frozenset(_PKG_VALUE_RE.findall(listings["system_packages.txt"][1])),
+        "third_party": frozenset(_PKG_VALUE_RE.findall(listings["third_party_packages.txt"][1])),
+    }
+
+
+def dump_installed_packages(dump_dir: Path, adb_shell: AdbShell, package_index: Dict[str, Any]) -> None:
+    """
+    Dump information about installed packages.
     
-    # Get list of third-party packages
-    _, third_party_packages, _ = run_adb_command(["adb", "shell", "pm", "list", "packages", "-3"])
-    save_to_file(dump_dir / "apks" / "third_party_packages.txt", third_party_packages)
+    The package lists come from package_index, see collect_package_index.
+    """
+    print("Dumping installed package information...")
     
-    # Get detailed package info for selected packages
-    # Parse the package list to extract package names
-    package_names = []
-    for line in packages.splitlines():
-        if line.startswith("package:"):
-            parts = line.split("=")
-            if len(parts) > 1:
-                package_names.append(parts[1])
+    # Every package's entry comes from one dumpsys call
+    package_entries = dump_package_entries(adb_shell)
     
     # Dump info for Chinese packages and system packages
-    chinese_keywords = ["com.ffalcon", "com.leiniao", "com.zhiliaoapp", "rayneo"]
-    for package in package_names:
-        is_chinese = any(keyword in package.lower() for keyword in chinese_keywords)
-        is_system = package in system_packages
+    for package in package_index["all"]:
+        is_chinese = _CHINESE_RE.search(package) is not None
+        is_system = package in package_index["system"]
         
         if is_chinese or (is_system and "android" in package):
-            _, package_info, _ = run_adb_command(["adb", "shell", "dumpsys", "package", package])
-            save_to_file(dump_dir / "apks" / f"{package}_info.txt", package_info)
+            save_to_file(dump_dir / "apks" / f"{package}_info.txt", package_entries.get(package, ""))
 
 
-def extract_apk_files(dump_dir: Path) -> None:
+def extract_apk_files(dump_dir: Path, adb_shell: AdbShell, package_index: Dict[str, Any]) -> None:
     """
     Extract actual APK files from the device.
     
-    This function extracts APK files for all packages on the device.
+    This function extracts APK files for all packages in package_index.
     """
     print("\nExtracting APK files...")
     
-    # Create directory for APK files
     apk_files_dir = dump_dir / "apks" / "files"
-    apk_files_dir.mkdir(exist_ok=True)
-    
-    # Get list of all packages with their paths
-    _, packages, _ = run_adb_command(["adb", "shell", "pm", "list", "packages", "-f"])
-    
-    # Parse package paths
-    package_paths = {}
-    for line in packages.splitlines():
-        if line.startswith("package:"):
-            path_part = line[8:].split("=")
-            if len(path_part) == 2:
-                package_paths[path_part[1]] = path_part[0]
     
     # Extract all APKs but prioritize Chinese packages
-    chinese_keywords = ["com.ffalcon", "com.leiniao", "com.zhiliaoapp", "rayneo"]
-    system_packages_of_interest = [
+    system_packages_of_interest = {
         "com.android.settings",
         "com.android.systemui"
-    ]
+    }
+    high_priority_packages = {
+        package for package in package_index["paths"]
+        if _CHINESE_RE.search(package) or package in system_packages_of_interest
+    }
     
-    # First, process high-priority packages (for display purposes)
-    high_priority_packages = {}
-    for package, path in package_paths.items():
-        is_chinese = any(keyword in package.lower() for keyword in chinese_keywords)
-        is_important_system = package in system_packages_of_interest
-        
-        if is_chinese or is_important_system:
-            high_priority_packages[package] = path
+    # High-priority packages go first in one stable ordering, so both the tar
+    # streams and the pull workers start with them
+    package_paths = dict(sorted(
+        package_index["paths"].items(),
+        key=lambda item: item[0] not in high_priority_packages,
+    ))
     
     # Count for progress reporting
     total_to_extract = len(package_paths)
-    extracted_count = 0
     print(f"Found {total_to_extract} packages to extract.")
     
-    # First extract high-priority packages
-    for package, path in high_priority_packages.items():
-        extracted_count += 1
-        print(f"Extracting APK [{extracted_count}/{total_to_extract}]: {package} (high priority)")
-        
-        # Safe filename for the package
-        safe_name = package.replace('.', '_')
-        output_path = apk_files_dir / f"{safe_name}.apk"
-        
-        # Pull the APK file
-        pull_cmd = ["adb", "pull", path, str(output_path)]
-        returncode, stdout, stderr = run_adb_command(pull_cmd, check=False)
-        
-        if returncode != 0:
-            print(f"  Failed to extract APK: {stderr}")
-            # Try alternative method for split APKs
-            _, path_output, _ = run_adb_command(["adb", "shell", "pm", "path", package])
-            if "package:" in path_output:
-                # Create package directory for split APKs
-                package_dir = apk_files_dir / safe_name
-                package_dir.mkdir(exist_ok=True)
-                
-                for i, path_line in enumerate(path_output.splitlines()):
-                    if path_line.startswith("package:"):
-                        apk_path = path_line[8:]
-                        base_name = os.path.basename(apk_path)
-                        output_path = package_dir / base_name
-                        
-                        pull_cmd = ["adb", "pull", apk_path, str(output_path)]
-                        run_adb_command(pull_cmd, check=False)
-        else:
-            print(f"  Successfully extracted to {output_path}")
-    
-    # Then extract remaining packages
-    for package, path in package_paths.items():
-        if package not in high_priority_packages:
+    # Reuse APKs cached by earlier dumps, stream the other base APKs as tar,
+    # then pull whatever that missed one by one
+    extracted = restore_cached_apks(package_paths, apk_files_dir, adb_shell)
+    extracted |= pull_apks_as_tar(
+        {package: path for package, path in package_paths.items() if package not in extracted},
+        apk_files_dir,
+    )
+    extracted_count = len(extracted)
+    remaining = [(package, path) for package, path in package_paths.items() if package not in extracted]
+    
+    # Look up the split APK paths of every remaining package up front, so a
+    # failed pull does not cost another round-trip
+    split_paths = collect_apk_paths([package for package, _ in remaining], adb_shell)
+    
+    # Each adb pull runs its own client, so several transfers can overlap
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {
+            executor.submit(_pull_apk, package, path, apk_files_dir, split_paths.get(package, [])): package
+            for package, path in remaining
+        }
+        for future in as_completed(futures):
+            package = futures[future]
             extracted_count += 1
-            print(f"Extracting APK [{extracted_count}/{total_to_extract}]: {package}")
-            
-            # Safe filename for the package
-            safe_name = package.replace('.', '_')
-            output_path = apk_files_dir / f"{safe_name}.apk"
-            
-            # Pull the APK file
-            pull_cmd = ["adb", "pull", path, str(output_path)]
-            returncode, stdout, stderr = run_adb_command(pull_cmd, check=False)
-            
-            if returncode != 0:
-                print(f"  Failed to extract APK: {stderr}")
-                # Try alternative method for split APKs
-                _, path_output, _ = run_adb_command(["adb", "shell", "pm", "path", package])
-                if "package:" in path_output:
-                    # Create package directory for split APKs
-                    package_dir = apk_files_dir / safe_name
-                    package_dir.mkdir(exist_ok=True)
-                    
-                    for i, path_line in enumerate(path_output.splitlines()):
-                        if path_line.startswith("package:"):
-                            apk_path = path_line[8:]
-                            base_name = os.path.basename(apk_path)
-                            output_path = package_dir / base_name
-                            
-                            pull_cmd = ["adb", "pull", apk_path, str(output_path)]
-                            run_adb_command(pull_cmd, check=False)
-            else:
-                print(f"  Successfully extracted to {output_path}")
+            priority = " (high priority)" if package in high_priority_packages else ""
+            print(f"Extracting APK [{extracted_count}/{total_to_extract}]: {package}{priority}")
+            _, message = future.result()
+            print(message)
     
     print(f"Extracted {extracted_count} APK files to {apk_files_dir}")
 
 
-def dump_memory_info(dump_dir: Path) -> None:
+def restore_cached_apks(package_paths: Dict[str, str], apk_files_dir: Path, adb_shell: AdbShell) -> Set[str]:
+    """
+    Copy APKs cached by earlier dumps instead of pulling them again.
+    
+    The sizes of all APKs on the device are read in batched scripts. A cached
+    APK is reused when its package name and size both match.
+    
+    Args:
+        package_paths: Mapping of package names to APK paths on the device
+        apk_files_dir: Local directory to save the APKs in
+        adb_shell: Persistent shell session
+    
+    Returns:
+        Names of the packages whose APK was restored from the cache
+    """
+    if not APK_CACHE_DIR.is_dir():
+        return set()
+    
+    sizes = adb_shell.run_batch({
+        package: f"stat -c %s {shlex.quote(path)}" for package, path in package_paths.items()
+    })
+    restored = set()
+    for package, (returncode, size) in sizes.items():
+        size = size.strip()
+        if returncode != 0 or not size.isdigit():
+            continue
+        cached_path = APK_CACHE_DIR / f"{package}_{size}.apk"
+        if cached_path.is_file():
+            _link_or_copy(cached_path, apk_files_dir / f"{package.replace('.', '_')}.apk")
+            restored.add(package)
+    
+    if restored:
+        print(f"Reused {len(restored)} unchanged APKs from {APK_CACHE_DIR}")
+    return restored
+
+
+def cache_apk(package: str, apk_path: Path) -> None:
+    """Keep a pulled APK in the cache, keyed by package name and size."""
+    try:
+        cached_path = APK_CACHE_DIR / f"{package}_{apk_path.stat().st_size}.apk"
+        if not cached_path.exists():
+            os.makedirs(APK_CACHE_DIR, exist_ok=True)
+            _link_or_copy(apk_path, cached_path)
+    except OSError as e:
+        print(f"  Could not cache {apk_path}: {e}")
+
+
+def _link_or_copy(source: Path, destination: Path) -> None:
+    """Hard-link a file, copying it instead when the link is not possible."""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+def pull_apks_as_tar(package_paths: Dict[str, str], apk_files_dir: Path) -> Set[str]:
+    """
+    Pull the base APKs of the given packages as tar streams.
+    
+    The quoted APK paths are split into tar commands of at most
+    MAX_EXEC_COMMAND bytes each, counting the "exec:" service prefix and the
+    tar wrapper, so no command line gets too long. Each
+    stream is unpacked on the fly into <safe_name>.apk files, which are
+    also added to the APK cache.
+    
+    Args:
+        package_paths: Mapping of package names to APK paths on the device
+        apk_files_dir: Local directory to save the APKs in
+    
+    Returns:
+        Names of the packages whose APK was extracted
+    """
+    packages_by_path = {path.lstrip("/"): package for package, path in package_paths.items()}
+    extracted = set()
+    
+    # exec-out merges stderr into the stream, so keep tar quiet
+    script_prefix, script_suffix = "tar -cf - ", " 2>/dev/null"
+    budget = MAX_EXEC_COMMAND - len("exec:") - len(script_prefix) - len(script_suffix)
+    
+    chunks: List[List[str]] = []
+    size = budget
+    for path in package_paths.values():
+        quoted = shlex.quote(path)
+        if size + len(quoted.encode()) > budget:
+            chunks.append([])
+            size = -1
+        chunks[-1].append(quoted)
+        size += len(quoted.encode()) + 1
+    
+    for chunk in chunks:
+        script = f"{script_prefix}{' '.join(chunk)}{script_suffix}"
+        process = subprocess.Popen(["adb", "exec-out", script], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        try:
+            with tarfile.open(fileobj=process.stdout, mode="r|") as tar:
+                for member in tar:
+                    package = packages_by_path.get(member.name.lstrip("/"))
+                    if package is None or not member.isfile():
+                        continue
+                    output_path = apk_files_dir / f"{package.replace('.', '_')}.apk"
+                    with open(output_path, "wb") as f:
+                        shutil.copyfileobj(tar.extractfile(member), f, 1024 * 1024)
+                    cache_apk(package, output_path)
+                    extracted.add(package)
+                    print(f"Extracting APK [{len(extracted)}/{len(package_paths)}]: {package}")
+                    print(f"  Successfully extracted to {output_path}")
+        except tarfile.TarError:
+            # No tar on the device, or the stream was cut short; the rest is pulled one by one
+            pass
+        finally:
+            process.stdout.close()
+            process.wait()
+    
+    return extracted
+
+
+def collect_apk_paths(packages: List[str], adb_shell: AdbShell) -> Dict[str, List[str]]:
+    """
+    Look up the APK paths (base and splits) of many packages in batched scripts.
+    
+    Args:
+        packages: Package names to look up
+        adb_shell: Persistent shell session
+    
+    Returns:
+        Dictionary mapping each package to its APK paths on the device
+    """
+    # `pm` is only a wrapper script around `cmd package`, so call that directly
+    results = adb_shell.run_batch({package: f"cmd package path {package}" for package in packages})
+    return {package: _PKG_VALUE_RE.findall(output) for package, (_, output) in results.items()}
+
+
+def _pull_apk(package: str, path: str, apk_files_dir: Path, split_paths: List[str]) -> Tuple[bool, str]:
+    """
+    Pull the APK of one package, falling back to its split APKs.
+    
+    Args:
+        package: Package name
+        path: Path of the base APK on the device
+        apk_files_dir: Local directory to save the APKs in
+        split_paths: Every APK path of the package, from collect_apk_paths
+    
+    Returns:
+        Tuple of (success, message to report)
+    """
+    # Safe filename for the package
+    safe_name = package.replace('.', '_')
+    output_path = apk_files_dir / f"{safe_name}.apk"
+    
+    # Pull the APK file
+    pull_cmd = ["adb", "pull", path, str(output_path)]
+    returncode, stdout, stderr = run_adb_command(pull_cmd, check=False)
+    
+    if returncode == 0:
+        cache_apk(package, output_path)
+        return True, f"  Successfully extracted to {output_path}"
+    
+    # Try alternative method for split APKs
+    if split_paths:
+        # Create package directory for split APKs
+        package_dir = apk_files_dir / safe_name
+        package_dir.mkdir(exist_ok=True)
+        
+        # One adb client pulls every split into the directory, keeping
+        # their base names
+        pull_cmd = ["adb", "pull", *split_paths, str(package_dir)]
+        run_adb_command(pull_cmd, check=False)
+    
+    return False, f"  Failed to extract APK: {stderr}"
+
+
+def dump_memory_info(dump_dir: Path, adb_shell: AdbShell, package_index: Dict[str, Any]) -> None:
     """
     Dump detailed memory information from the device.
+    
+    The packages to inspect come from package_index, see collect_package_index.
     """
     print("\nDumping memory information...")
     memory_dir = dump_dir / "memory"
-    memory_dir.mkdir(exist_ok=True)
     
-    # Get memory stats using various commands
+    # Get memory stats using various commands, all in one round-trip
     memory_commands = {
-        "meminfo": ["adb", "shell", "cat", "/proc/meminfo"],
-        "dumpsys_meminfo": ["adb", "shell", "dumpsys", "meminfo"],
-        "top_processes": ["adb", "shell", "top", "-n", "1", "-o", "RES"],
-        "slabtop": ["adb", "shell", "cat", "/proc/slabinfo"],
-        "vmstat": ["adb", "shell", "cat", "/proc/vmstat"],
-        "zoneinfo": ["adb", "shell", "cat", "/proc/zoneinfo"],
-        "buddyinfo": ["adb", "shell", "cat", "/proc/buddyinfo"],
+        "meminfo": "cat /proc/meminfo",
+        "dumpsys_meminfo": "dumpsys meminfo",
+        "top_processes": "top -n 1 -o RES",
+        "slabtop": "cat /proc/slabinfo",
+        "vmstat": "cat /proc/vmstat",
+        "zoneinfo": "cat /proc/zoneinfo",
+        "buddyinfo": "cat /proc/buddyinfo",
         # System service memory
-        "activity_memory": ["adb", "shell", "dumpsys", "activity", "memory"],
+        "activity_memory": "dumpsys activity memory",
     }
     
-    for name, command in memory_commands.items():
-        print(f"Getting {name}...")
-        returncode, stdout, stderr = run_adb_command(command, check=False)
+    print(f"Getting {', '.join(memory_commands)}...")
+    for name, (returncode, stdout) in run_cached_batch(adb_shell, memory_commands, binary=True).items():
         if returncode == 0:
             save_to_file(memory_dir / f"{name}.txt", stdout)
         else:
-            print(f"Failed to get {name}: {stderr}")
+            print(f"Failed to get {name}: exit code {returncode}")
     
     # Get memory info for specific processes (especially Chinese apps)
-    _, packages, _ = run_adb_command(["adb", "shell", "pm", "list", "packages"])
-    chinese_keywords = ["com.ffalcon", "com.leiniao", "com.zhiliaoapp", "rayneo"]
     process_dir = memory_dir / "processes"
-    process_dir.mkdir(exist_ok=True)
-    
-    for line in packages.splitlines():
-        if line.startswith("package:"):
-            package = line[8:]
-            is_chinese = any(keyword in package.lower() for keyword in chinese_keywords)
-            
-            if is_chinese:
-                print(f"Getting memory info for {package}...")
-                _, stdout, _ = run_adb_command(
-                    ["adb", "shell", "dumpsys", "meminfo", package],
-                    check=False
-                )
-                if stdout:
-                    save_to_file(process_dir / f"{package.replace('.', '_')}_meminfo.txt", stdout)
+    chinese_packages = [package for package in package_index["all"] if _CHINESE_RE.search(package)]
+    
+    # One round-trip per batch script for every package's memory info
+    results = adb_shell.run_batch({package: f"dumpsys meminfo {package}" for package in chinese_packages}, binary=True)
+    for package in chinese_packages:
+        print(f"Getting memory info for {package}...")
+        _, stdout = results[package]
+        if stdout:
+            save_to_file(process_dir / f"{package.replace('.', '_')}_meminfo.txt", stdout)
 
 
-def dump_system_logs(dump_dir: Path) -> None:
+def dump_system_logs(dump_dir: Path, adb_shell: AdbShell) -> None:
     """
     Dump system logs.
     """
     print("Dumping system logs...")
     
-    # Dump logcat
-    _, logcat, _ = run_adb_command(["adb", "logcat", "-d"])
-    save_to_file(dump_dir / "logs" / "logcat.txt", logcat)
-    
-    # Dump dmesg
-    _, dmesg, _ = run_adb_command(["adb", "shell", "dmesg"])
-    save_to_file(dump_dir / "logs" / "dmesg.txt", dmesg)
+    # The logs can be many megabytes, so they are streamed straight to disk
+    # and gzipped on the way. Each one runs its own adb client, so the three
+    # transfers overlap.
+    log_commands = {
+        "logcat.txt.gz": ["adb", "logcat", "-d"],
+        "dmesg.txt.gz": ["adb", "shell", "dmesg"],
+        "events.txt.gz": ["adb", "logcat", "-b", "events", "-d"],
+    }
     
-    # Dump event logs
-    _, eventlog, _ = run_adb_command(["adb", "logcat", "-b", "events", "-d"])
-    save_to_file(dump_dir / "logs" / "events.txt", eventlog)
+    with ThreadPoolExecutor(max_workers=len(log_commands)) as executor:
+        futures = [
+            executor.submit(run_adb_command, command, stream_to=dump_dir / "logs" / filename)
+            for filename, command in log_commands.items()
+        ]
+        for future in futures:
+            future.result()
 
 
-def extract_system_files(dump_dir: Path) -> None:
+def extract_system_files(dump_dir: Path, adb_shell: AdbShell) -> None:
     """
     Extract important system files.
     
@@ -424,9 +775,7 @@ def extract_system_files(dump_dir: Path) -> None:
     """
     print("Attempting to extract system files (some operations may fail due to permissions)...")
     
-    # Create system files directory
     system_dir = dump_dir / "system_files"
-    system_dir.mkdir(exist_ok=True)
     
     # List of important system files to extract
     system_files = [
@@ -436,13 +785,13 @@ def extract_system_files(dump_dir: Path) -> None:
         "/system/etc/hosts"
     ]
     
-    for file_path in system_files:
-        file_name = os.path.basename(file_path)
-        _, content, _ = run_adb_command(["adb", "shell", "cat", file_path], check=False)
-        save_to_file(system_dir / file_name, content)
+    # Read every file in one round-trip
+    contents = adb_shell.run_batch({file_path: f"cat {file_path}" for file_path in system_files}, binary=True)
+    for file_path, (_, content) in contents.items():
+        save_to_file(system_dir / os.path.basename(file_path), content)
 
 
-def dump_partition_contents(dump_dir: Path) -> None:
+def dump_partition_contents(dump_dir: Path, adb_shell: AdbShell) -> None:
     """
     Dump partition contents (requires root or specific permissions).
     This is a potentially dangerous operation and may not work on all devices.
@@ -462,35 +811,30 @@ def dump_partition_contents(dump_dir: Path) -> None:
         "/dev/block/*/by-name/*"
     ]
     
+    # Resolve the symlinks of every pattern on the device, all in one round-trip
+    listings = adb_shell.run_batch({
+        pattern: f'for f in {pattern}; do [ -L "$f" ] && echo "${{f##*/}} $(readlink -f "$f")"; done 2>/dev/null'
+        for pattern in path_patterns
+    })
+    
     for pattern in path_patterns:
-        _, output, _ = run_adb_command(["adb", "shell", f"ls -la {pattern} 2>/dev/null"], check=False)
-        if output and "No such file" not in output and "Permission denied" not in output:
+        _, output = listings[pattern]
+        links = [line.split(" ", 1) for line in output.splitlines() if " " in line]
+        if links:
             print(f"Found block devices using pattern: {pattern}")
             
             # Parse the output to get partition names and their real paths
-            for line in output.splitlines():
-                if "->" in line:  # It's a symlink
-                    parts = line.split()
-                    if len(parts) >= 9:
-                        partition_name = parts[8]
-                        if "/" in partition_name:
-                            partition_name = os.path.basename(partition_name)
-                        
-                        # Get the target of the symlink
-                        _, target, _ = run_adb_command(
-                            ["adb", "shell", f"readlink -f {pattern.replace('*', partition_name)}"],
-                            check=False
-                        )
-                        if target and "No such file" not in target:
-                            partition_paths[partition_name] = target.strip()
+            for partition_name, target in links:
+                if target.strip():
+                    partition_paths[partition_name] = target.strip()
     
     if not partition_paths:
         # If we couldn't find partitions using symlinks, try a more direct approach
-        _, output, _ = run_adb_command(["adb", "shell", "ls -la /dev/block/"], check=False)
+        _, output, _ = run_adb_command(["adb", "shell", "ls -la /dev/block/"], check=False, adb_shell=adb_shell, binary=True)
         save_to_file(dump_dir / "partitions" / "block_devices_direct.txt", output)
         
         # Try to look for common partition names in /proc/partitions
-        _, partitions_output, _ = run_adb_command(["adb", "shell", "cat /proc/partitions"], check=False)
+        _, partitions_output, _ = run_adb_command(["adb", "shell", "cat /proc/partitions"], check=False, adb_shell=adb_shell)
         save_to_file(dump_dir / "partitions" / "proc_partitions_raw.txt", partitions_output)
         
         print("Could not find partition symlinks. Looking at raw block devices...")
@@ -505,7 +849,7 @@ def dump_partition_contents(dump_dir: Path) -> None:
                         partition_paths[partition_name] = f"/dev/block/{partition_name}"
     
     # Save the identified partition paths
-    partition_paths_output = "\n".join([f"{name}: {path}" for name, path in partition_paths.items()])
+    partition_paths_output = "\n".join(f"{name}: {path}" for name, path in partition_paths.items())
     save_to_file(dump_dir / "partitions" / "identified_partitions.txt", partition_paths_output)
     
     if not partition_paths:
@@ -517,15 +861,18 @@ def dump_partition_contents(dump_dir: Path) -> None:
     
     # Attempt to dump ALL partitions, not just a predefined list
     partitions_dir = dump_dir / "partitions" / "images"
-    partitions_dir.mkdir(exist_ok=True)
     
-    # Get partition info for all partitions
+    # Get partition info for all partitions, with every size in one round-trip
+    sizes = adb_shell.run_batch({
+        partition_name: f"blockdev --getsize64 {source_path}"
+        for partition_name, source_path in partition_paths.items()
+    })
     for partition_name, source_path in partition_paths.items():
         print(f"Getting info for {partition_name} partition at {source_path}...")
         
         # Get partition size
-        _, size_output, _ = run_adb_command(["adb", "shell", f"blockdev --getsize64 {source_path}"], check=False)
-        if size_output and "No such file" not in size_output and "Permission denied" not in size_output:
+        returncode, size_output = sizes[partition_name]
+        if returncode == 0 and size_output.strip().isdigit():
             size_bytes = int(size_output.strip())
             size_mb = size_bytes / (1024 * 1024)
             partition_info = f"Partition: {partition_name}\nPath: {source_path}\nSize: {size_bytes} bytes ({size_mb:.2f} MB)"
@@ -534,36 +881,18 @@ def dump_partition_contents(dump_dir: Path) -> None:
     # Attempt to dump all identified partitions
     for partition_name, source_path in partition_paths.items():
         print(f"Attempting to dump {partition_name} partition from {source_path}...")
-        remote_path = f"/sdcard/{partition_name}.img"
+        image_path = partitions_dir / f"{partition_name}.img"
         
-        # Use dd to dump the partition - this may fail without root
-        dump_cmd = ["adb", "shell", f"dd if={source_path} of={remote_path} bs=4096"]
-        returncode, stdout, stderr = run_adb_command(dump_cmd, check=False)
+        # Use dd to dump the partition - this may fail without root. Large
+        # blocks keep dd's syscall count low, so USB bandwidth is the limit.
+        if stream_partition(f"dd if={source_path} bs=4M", image_path):
+            continue
+        print(f"Failed to dump {partition_name} partition")
         
-        if returncode == 0:
-            # Pull the file
-            pull_cmd = ["adb", "pull", remote_path, str(partitions_dir / f"{partition_name}.img")]
-            run_adb_command(pull_cmd, check=False)
-            
-            # Remove remote file
-            run_adb_command(["adb", "shell", f"rm {remote_path}"], check=False)
-        else:
-            print(f"Failed to dump {partition_name} partition: {stderr}")
-            
-            # Try direct read with cat (might still fail without root)
-            print(f"Trying alternative method for {partition_name}...")
-            cat_cmd = ["adb", "shell", f"cat {source_path} > {remote_path}"]
-            returncode, stdout, stderr = run_adb_command(cat_cmd, check=False)
-            
-            if returncode == 0:
-                # Pull the file
-                pull_cmd = ["adb", "pull", remote_path, str(partitions_dir / f"{partition_name}.img")]
-                run_adb_command(pull_cmd, check=False)
-                
-                # Remove remote file
-                run_adb_command(["adb", "shell", f"rm {remote_path}"], check=False)
-            else:
-                print(f"Alternative method also failed: {stderr}")
+        # Try direct read with cat (might still fail without root)
+        print(f"Trying alternative method for {partition_name}...")
+        if not stream_partition(f"cat {source_path}", image_path):
+            print("Alternative method also failed")
     
     # Check if any partitions were dumped
     dumped_files = list(partitions_dir.glob("*.img"))
@@ -580,132 +909,136 @@ def dump_partition_contents(dump_dir: Path) -> None:
         print(f"\nSuccessfully dumped {len(dumped_files)} partitions to {partitions_dir}")
 
 
-def create_summary(dump_dir: Path) -> None:
+def stream_partition(read_command: str, image_path: Path) -> bool:
+    """
+    Stream a partition read on the device straight into a local image file.
+    
+    The data goes over `adb exec-out` instead of being staged on /sdcard and
+    pulled, so the device needs no free space for it.
+    
+    Args:
+        read_command: Device command writing the partition contents to stdout
+        image_path: Local file to write the image to
+    
+    Returns:
+        True if any data was read, False if the image was removed
+    """
+    # exec-out merges stderr into the stream, so keep it out of the image
+    run_adb_command(["adb", "exec-out", f"{read_command} 2>/dev/null"], check=False, stream_to=image_path)
+    if image_path.stat().st_size > 0:
+        return True
+    image_path.unlink()
+    return False
+
+
+def create_summary(dump_dir: Path, package_index: Dict[str, Any]) -> None:
     """
     Create a summary of the dumped information.
+    
+    Reads the dumped files back through the writer, so call it only after
+    dump_writer has been closed. The summary itself is written as a plain file.
+    
+    Args:
+        dump_dir: Dump directory
+        package_index: Package lists from collect_package_index, used for
+            the package counts
     """
+    def read_text(path: Path) -> Optional[str]:
+        content = dump_writer.read(path)
+        return content.decode("utf-8", "replace") if content is not None else None
+    
     summary = []
     summary.append("# RanNeo X2 System Dump Summary")
     summary.append(f"Dump created on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     summary.append("")
     
     # Read important properties
-    try:
-        with open(dump_dir / "props" / "important_props.txt", 'r') as f:
-            props = f.read()
-            summary.append("## Device Information")
-            summary.append("```")
-            summary.append(props)
-            summary.append("```")
-    except FileNotFoundError:
-        pass
-    
-    # Count packages
-    try:
-        with open(dump_dir / "apks" / "package_list.txt", 'r') as f:
-            package_count = len(f.readlines())
-            summary.append(f"\n## Package Information")
-            summary.append(f"Total packages: {package_count}")
-    except FileNotFoundError:
-        pass
-    
-    try:
-        with open(dump_dir / "apks" / "system_packages.txt", 'r') as f:
-            system_package_count = len(f.readlines())
-            summary.append(f"System packages: {system_package_count}")
-    except FileNotFoundError:
-        pass
-    
-    try:
-        with open(dump_dir / "apks" / "third_party_packages.txt", 'r') as f:
-            third_party_count = len(f.readlines())
-            summary.append(f"Third-party packages: {third_party_count}")
-    except FileNotFoundError:
-        pass
+    props = read_text(dump_dir / "props" / "important_props.txt")
+    if props is not None:
+        summary.append("## Device Information")
+        summary.append("```")
+        summary.append(props)
+        summary.append("```")
+    
+    # Count packages from the index instead of reading the lists back
+    summary.append(f"\n## Package Information")
+    summary.append(f"Total packages: {len(package_index['all'])}")
+    summary.append(f"System packages: {len(package_index['system'])}")
+    summary.append(f"Third-party packages: {len(package_index['third_party'])}")
     
     # Bootloader status
-    try:
-        with open(dump_dir / "bootloader" / "status.txt", 'r') as f:
-            bootloader_status = f.read()
-            summary.append(f"\n## Bootloader Information")
-            summary.append("```")
-            summary.append(bootloader_status)
-            summary.append("```")
-    except FileNotFoundError:
-        pass
+    bootloader_status = read_text(dump_dir / "bootloader" / "status.txt")
+    if bootloader_status is not None:
+        summary.append(f"\n## Bootloader Information")
+        summary.append("```")
+        summary.append(bootloader_status)
+        summary.append("```")
     
     # Save summary
     summary_text = "\n".join(summary)
-    save_to_file(dump_dir / "summary.md", summary_text)
+    (dump_dir / "summary.md").write_text(summary_text, encoding="utf-8")
     print(f"Summary created at {dump_dir / 'summary.md'}")
 
 
-def dump_bluetooth_info(dump_dir: Path) -> None:
+def dump_bluetooth_info(dump_dir: Path, adb_shell: AdbShell) -> None:
     """
     Dump detailed Bluetooth information.
     """
     print("Dumping Bluetooth information...")
     
-    # Create Bluetooth directory
     bluetooth_dir = dump_dir / "bluetooth"
-    bluetooth_dir.mkdir(exist_ok=True)
     
-    # Dump Bluetooth manager info
-    _, bluetooth_manager, _ = run_adb_command(["adb", "shell", "dumpsys", "bluetooth_manager"])
+    # Dump Bluetooth manager info; the GATT and profile sections are cut
+    # from this one dump instead of running dumpsys again
+    _, bluetooth_manager, _ = run_adb_command(["adb", "shell", "dumpsys", "bluetooth_manager"], adb_shell=adb_shell)
     save_to_file(bluetooth_dir / "bluetooth_manager.txt", bluetooth_manager)
     
     # Dump Bluetooth processes
-    _, bluetooth_processes, _ = run_adb_command(["adb", "shell", "ps", "-A", "|", "grep", "-i", "bluetooth"])
-    save_to_file(bluetooth_dir / "bluetooth_processes.txt", bluetooth_processes)
+    _, processes, _ = run_adb_command(["adb", "shell", "ps", "-A"], adb_shell=adb_shell)
+    save_to_file(bluetooth_dir / "bluetooth_processes.txt", grep_lines(processes, "bluetooth", ignore_case=True))
     
     # Dump Bluetooth GATT services
-    _, bluetooth_gatt, _ = run_adb_command(["adb", "shell", "dumpsys", "bluetooth_manager", "|", "grep", "-A", "50", "GATT"])
-    save_to_file(bluetooth_dir / "bluetooth_gatt.txt", bluetooth_gatt)
+    save_to_file(bluetooth_dir / "bluetooth_gatt.txt", grep_lines(bluetooth_manager, "GATT", after=50))
     
     # Dump Bluetooth profiles
-    _, bluetooth_profiles, _ = run_adb_command(["adb", "shell", "dumpsys", "bluetooth_manager", "|", "grep", "-i", "profile", "-A", "5"])
-    save_to_file(bluetooth_dir / "bluetooth_profiles.txt", bluetooth_profiles)
+    save_to_file(bluetooth_dir / "bluetooth_profiles.txt", grep_lines(bluetooth_manager, "profile", after=5, ignore_case=True))
 
 
-def dump_input_devices(dump_dir: Path) -> None:
+def dump_input_devices(dump_dir: Path, adb_shell: AdbShell) -> None:
     """
     Dump information about input devices.
     """
     print("Dumping input device information...")
     
-    # Create input directory
     input_dir = dump_dir / "input"
-    input_dir.mkdir(exist_ok=True)
     
     # Dump input manager info
-    _, input_manager, _ = run_adb_command(["adb", "shell", "dumpsys", "input"])
+    _, input_manager, _ = run_adb_command(["adb", "shell", "dumpsys", "input"], adb_shell=adb_shell, binary=True)
     save_to_file(input_dir / "input_manager.txt", input_manager)
     
     # List input devices
-    _, input_devices, _ = run_adb_command(["adb", "shell", "ls", "-l", "/dev/input/"])
+    _, input_devices, _ = run_adb_command(["adb", "shell", "ls", "-l", "/dev/input/"], adb_shell=adb_shell, binary=True)
     save_to_file(input_dir / "input_devices.txt", input_devices)
     
     # Dump input method services
-    _, input_method, _ = run_adb_command(["adb", "shell", "dumpsys", "input_method"])
+    _, input_method, _ = run_adb_command(["adb", "shell", "dumpsys", "input_method"], adb_shell=adb_shell, binary=True)
     save_to_file(input_dir / "input_method.txt", input_method)
     
     # Dump accessibility services
-    _, accessibility, _ = run_adb_command(["adb", "shell", "dumpsys", "accessibility"])
+    _, accessibility, _ = run_adb_command(["adb", "shell", "dumpsys", "accessibility"], adb_shell=adb_shell, binary=True)
     save_to_file(input_dir / "accessibility.txt", accessibility)
 
 
-def dump_services_info(dump_dir: Path) -> None:
+def dump_services_info(dump_dir: Path, adb_shell: AdbShell) -> None:
     """
     Dump information about system services.
     """
     print("Dumping system services information...")
     
-    # Create services directory
     services_dir = dump_dir / "services"
-    services_dir.mkdir(exist_ok=True)
     
     # Get list of all services
-    _, services_list, _ = run_adb_command(["adb", "shell", "service", "list"])
+    _, services_list, _ = run_adb_command(["adb", "shell", "service", "list"], adb_shell=adb_shell, binary=True)
     save_to_file(services_dir / "services_list.txt", services_list)
     
     # Dump important services
@@ -726,8 +1059,10 @@ def dump_services_info(dump_dir: Path) -> None:
         "permission"
     ]
     
-    for service in important_services:
-        _, service_dump, _ = run_adb_command(["adb", "shell", "dumpsys", service], check=False)
+    # One batched round-trip; the dumps dump_hardware_info also saves are
+    # only run once
+    service_dumps = run_cached_batch(adb_shell, {service: f"dumpsys {service}" for service in important_services}, binary=True)
+    for service, (_, service_dump) in service_dumps.items():
         save_to_file(services_dir / f"{service}.txt", service_dump)
     
     # Dump Mercury-related services
@@ -738,142 +1073,155 @@ def dump_services_info(dump_dir: Path) -> None:
         "com.ffalcon.xr.unity.demo"
     ]
     
+    # Shares the single `dumpsys package packages` call with dump_installed_packages
+    package_entries = dump_package_entries(adb_shell)
     for package in mercury_packages:
-        _, package_info, _ = run_adb_command(["adb", "shell", "dumpsys", "package", package], check=False)
-        save_to_file(services_dir / f"{package.replace('.', '_')}.txt", package_info)
+        save_to_file(services_dir / f"{package.replace('.', '_')}.txt", package_entries.get(package, ""))
 
 
-def dump_firmware_info(dump_dir: Path) -> None:
+def dump_firmware_info(dump_dir: Path, adb_shell: AdbShell, prop_map: Dict[str, str]) -> None:
     """
     Dump firmware and hardware-related information.
+    
+    Properties are looked up in prop_map, the parsed getprop output from
+    dump_device_info.
     """
     print("Dumping firmware information...")
     
-    # Create firmware directory
     firmware_dir = dump_dir / "firmware"
-    firmware_dir.mkdir(exist_ok=True)
     
-    # Dump kernel information
-    _, kernel_version, _ = run_adb_command(["adb", "shell", "uname", "-a"])
-    save_to_file(firmware_dir / "kernel_version.txt", kernel_version)
-    
-    # Dump kernel modules
-    _, kernel_modules, _ = run_adb_command(["adb", "shell", "lsmod"])
-    save_to_file(firmware_dir / "kernel_modules.txt", kernel_modules)
+    # Dump kernel information and modules in one round-trip; uname is shared
+    # with dump_device_info
+    outputs = run_cached_batch(adb_shell, {
+        "kernel_version.txt": "uname -a",
+        "kernel_modules.txt": "lsmod",
+        "device_tree.txt": "ls -la /proc/device-tree",
+    }, binary=True)
+    for filename in ("kernel_version.txt", "kernel_modules.txt"):
+        save_to_file(firmware_dir / filename, outputs[filename][1])
     
     # Dump firmware version
-    _, firmware_version, _ = run_adb_command(["adb", "shell", "getprop", "ro.build.version.incremental"])
+    firmware_version = prop_map.get("ro.build.version.incremental", "")
     save_to_file(firmware_dir / "firmware_version.txt", f"Firmware version: {firmware_version.strip()}")
     
     # Dump hardware info
-    _, hardware_info, _ = run_adb_command(["adb", "shell", "getprop", "ro.hardware"])
+    hardware_info = prop_map.get("ro.hardware", "")
     save_to_file(firmware_dir / "hardware_info.txt", f"Hardware: {hardware_info.strip()}")
     
     # Dump SOC info
-    _, soc_info, _ = run_adb_command(["adb", "shell", "getprop", "ro.board.platform"])
+    soc_info = prop_map.get("ro.board.platform", "")
     save_to_file(firmware_dir / "soc_info.txt", f"SOC Platform: {soc_info.strip()}")
     
     # Try to get device tree info
-    _, device_tree, _ = run_adb_command(["adb", "shell", "ls", "-la", "/proc/device-tree"], check=False)
-    save_to_file(firmware_dir / "device_tree.txt", device_tree)
+    save_to_file(firmware_dir / "device_tree.txt", outputs["device_tree.txt"][1])
     
     # Dump all hardware-related properties
-    _, hw_props, _ = run_adb_command(["adb", "shell", "getprop", "|", "grep", "hardware"])
-    save_to_file(firmware_dir / "hardware_properties.txt", hw_props)
+    save_to_file(firmware_dir / "hardware_properties.txt", filter_properties(prop_map, "hardware"))
     
     # Dump all firmware-related properties
-    _, fw_props, _ = run_adb_command(["adb", "shell", "getprop", "|", "grep", "firmware"])
-    save_to_file(firmware_dir / "firmware_properties.txt", fw_props)
+    save_to_file(firmware_dir / "firmware_properties.txt", filter_properties(prop_map, "firmware"))
 
 
-def dump_security_info(dump_dir: Path) -> None:
+def dump_security_info(dump_dir: Path, adb_shell: AdbShell, prop_map: Dict[str, str]) -> None:
     """
     Dump security-related information.
+    
+    Properties are filtered from prop_map, the parsed getprop output from
+    dump_device_info.
     """
     print("Dumping security information...")
     
-    # Create security directory
     security_dir = dump_dir / "security"
-    security_dir.mkdir(exist_ok=True)
     
     # Dump SELinux status
-    _, selinux_status, _ = run_adb_command(["adb", "shell", "getenforce"])
+    _, selinux_status, _ = run_adb_command(["adb", "shell", "getenforce"], adb_shell=adb_shell)
     save_to_file(security_dir / "selinux_status.txt", f"SELinux status: {selinux_status.strip()}")
     
     # Dump SELinux contexts
-    _, selinux_contexts, _ = run_adb_command(["adb", "shell", "ls", "-Z", "/"])
+    _, selinux_contexts, _ = run_adb_command(["adb", "shell", "ls", "-Z", "/"], adb_shell=adb_shell, binary=True)
     save_to_file(security_dir / "selinux_root_contexts.txt", selinux_contexts)
     
     # Dump security-related properties
-    _, security_props, _ = run_adb_command(["adb", "shell", "getprop", "|", "grep", "security"])
-    save_to_file(security_dir / "security_properties.txt", security_props)
+    save_to_file(security_dir / "security_properties.txt", filter_properties(prop_map, "security"))
     
     # Dump secure properties
-    _, secure_props, _ = run_adb_command(["adb", "shell", "getprop", "|", "grep", "secure"])
-    save_to_file(security_dir / "secure_properties.txt", secure_props)
+    save_to_file(security_dir / "secure_properties.txt", filter_properties(prop_map, "secure"))
     
     # Check for root
-    _, su_check, _ = run_adb_command(["adb", "shell", "which", "su"], check=False)
+    _, su_check, _ = run_adb_command(["adb", "shell", "which", "su"], check=False, adb_shell=adb_shell)
     save_to_file(security_dir / "su_check.txt", f"su binary found: {'Yes' if su_check.strip() else 'No'}")
     
     # Check for Magisk
-    _, magisk_check, _ = run_adb_command(["adb", "shell", "ls", "-la", "/sbin/.magisk"], check=False)
-    save_to_file(security_dir / "magisk_check.txt", f"Magisk found: {'Yes' if "No such file" not in magisk_check else 'No'}")
+    _, magisk_check, _ = run_adb_command(["adb", "shell", "ls", "-la", "/sbin/.magisk"], check=False, adb_shell=adb_shell)
+    save_to_file(security_dir / "magisk_check.txt", f"Magisk found: {'Yes' if 'No such file' not in magisk_check else 'No'}")
 
 
-def dump_hardware_info(dump_dir: Path) -> None:
+def dump_hardware_info(dump_dir: Path, adb_shell: AdbShell) -> None:
     """
     Dump detailed hardware information.
     """
     print("Dumping hardware information...")
     
-    # Create hardware directory
     hardware_dir = dump_dir / "hardware"
-    hardware_dir.mkdir(exist_ok=True)
-    
-    # Dump CPU info
-    _, cpu_info, _ = run_adb_command(["adb", "shell", "cat", "/proc/cpuinfo"])
-    save_to_file(hardware_dir / "cpu_info.txt", cpu_info)
-    
-    # Dump memory info
-    _, memory_info, _ = run_adb_command(["adb", "shell", "cat", "/proc/meminfo"])
-    save_to_file(hardware_dir / "memory_info.txt", memory_info)
-    
-    # Dump GPU info
-    _, gpu_info, _ = run_adb_command(["adb", "shell", "dumpsys", "SurfaceFlinger"])
-    save_to_file(hardware_dir / "gpu_info.txt", gpu_info)
-    
-    # Dump display info
-    _, display_info, _ = run_adb_command(["adb", "shell", "dumpsys", "display"])
-    save_to_file(hardware_dir / "display_info.txt", display_info)
     
-    # Dump sensor info
-    _, sensor_info, _ = run_adb_command(["adb", "shell", "dumpsys", "sensorservice"])
-    save_to_file(hardware_dir / "sensor_info.txt", sensor_info)
-    
-    # Dump camera info
-    _, camera_info, _ = run_adb_command(["adb", "shell", "dumpsys", "media.camera"])
-    save_to_file(hardware_dir / "camera_info.txt", camera_info)
-    
-    # Dump audio info
-    _, audio_info, _ = run_adb_command(["adb", "shell", "dumpsys", "audio"])
-    save_to_file(hardware_dir / "audio_info.txt", audio_info)
-    
-    # Dump battery info
-    _, battery_info, _ = run_adb_command(["adb", "shell", "dumpsys", "battery"])
-    save_to_file(hardware_dir / "battery_info.txt", battery_info)
-    
-    # Dump thermal info
-    _, thermal_info, _ = run_adb_command(["adb", "shell", "dumpsys", "thermalservice"], check=False)
-    save_to_file(hardware_dir / "thermal_info.txt", thermal_info)
+    # CPU, memory and GPU identity are quick reads, so they share one batch
+    for filename, (_, output) in run_cached_batch(adb_shell, {
+        "cpu_info.txt": "cat /proc/cpuinfo",
+        "memory_info.txt": "cat /proc/meminfo",
+        "gpu_info.txt": GPU_INFO_COMMAND,
+    }, binary=True).items():
+        save_to_file(hardware_dir / filename, output)
+    
+    # Display, sensor, camera, audio, battery, thermal and USB info. Each
+    # dumpsys mostly waits on the service it queries, so they run in parallel
+    # over separate sessions; the outputs other dumps also save are fetched once
+    dumpsys_commands = {
+        "display_info.txt": "dumpsys display",
+        "sensor_info.txt": "dumpsys sensorservice",
+        "camera_info.txt": "dumpsys media.camera",
+        "audio_info.txt": "dumpsys audio",
+        "battery_info.txt": "dumpsys battery",
+        "thermal_info.txt": "dumpsys thermalservice",
+        "usb_info.txt": "dumpsys usb",
+    }
+    if FULL_SURFACEFLINGER_DUMP:
+        dumpsys_commands["surfaceflinger.txt"] = "dumpsys SurfaceFlinger"
+    
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {
+            executor.submit(run_cached_batch, adb_shell, {filename: command}, binary=True): filename
+            for filename, command in dumpsys_commands.items()
+        }
+        for future in as_completed(futures):
+            filename = futures[future]
+            _, output = future.result()[filename]
+            save_to_file(hardware_dir / filename, output)
+    
+    # Dump device tree if available. A single tar on the device replaces the
+    # echo and cat per node, and the stream goes straight to disk next to the
+    # archive; list or extract the nodes with `tar -tf` / `tar -xf`
+    os.makedirs(hardware_dir, exist_ok=True)
+    device_tree_path = hardware_dir / "device_tree.tar"
+    run_adb_command(
+        ["adb", "exec-out", "tar -cf - -C /proc/device-tree . 2>/dev/null"],
+        check=False,
+        stream_to=device_tree_path,
+    )
+    if device_tree_path.stat().st_size == 0:
+        device_tree_path.unlink()
+
+
+def extract_bulk_files(dump_dir: Path, adb_shell: AdbShell, package_index: Dict[str, Any]) -> None:
+    """
+    Extract the APK files, then dump the partition contents.
     
-    # Dump USB info
-    _, usb_info, _ = run_adb_command(["adb", "shell", "dumpsys", "usb"])
-    save_to_file(hardware_dir / "usb_info.txt", usb_info)
+    These two move the most data, so they run one after the other rather
+    than competing for the USB link, while the smaller dumps run alongside.
+    """
+    extract_apk_files(dump_dir, adb_shell, package_index)
     
-    # Dump device tree if available
-    _, device_tree, _ = run_adb_command(["adb", "shell", "find", "/proc/device-tree", "-type", "f", "-exec", "echo", "{}", ";", "-exec", "cat", "{}", ";", "2>/dev/null"], check=False)
-    save_to_file(hardware_dir / "device_tree_dump.txt", device_tree)
+    # Run partition dump without asking
+    dump_partition_contents(dump_dir, adb_shell)
 
 
 def main():
@@ -883,39 +1231,47 @@ def main():
     
     # Set up the dump directory
     dump_dir = setup_dump_directory()
+    dump_writer.open_archive(DUMP_ARCHIVE, dump_dir, compress=False, prefix_root=False)
     
-    # Perform the dumps
-    dump_device_info(dump_dir)
-    dump_partition_info(dump_dir)
-    dump_bootloader_info(dump_dir)
-    dump_installed_packages(dump_dir)
-    dump_system_logs(dump_dir)
-    extract_system_files(dump_dir)
-    
-    # Extract APK files
-    extract_apk_files(dump_dir)
+    # Perform the dumps over persistent adb shells, one per worker
+    start_adb_server()
     
-    # Dump memory information
-    dump_memory_info(dump_dir)
-    
-    # Dump Bluetooth and input device information
-    dump_bluetooth_info(dump_dir)
-    dump_input_devices(dump_dir)
-    dump_services_info(dump_dir)
-    
-    # Dump firmware, hardware, and security information
-    dump_firmware_info(dump_dir)
-    dump_hardware_info(dump_dir)
-    dump_security_info(dump_dir)
-    
-    # Run partition dump without asking
-    dump_partition_contents(dump_dir)
+    try:
+        with AdbShell(max_sessions=MAX_WORKERS) as adb_shell:
+            prop_map = dump_device_info(dump_dir, adb_shell)
+            package_index = collect_package_index(dump_dir, adb_shell)
+            
+            # These groups only read from the device, so run them concurrently.
+            # The bulk transfers start right away with them instead of waiting for
+            # the slowest group; they only need the package index
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                futures = [
+                    executor.submit(extract_bulk_files, dump_dir, adb_shell, package_index),
+                    executor.submit(dump_partition_info, dump_dir, adb_shell),
+                    executor.submit(dump_bootloader_info, dump_dir, adb_shell, prop_map),
+                    executor.submit(dump_installed_packages, dump_dir, adb_shell, package_index),
+                    executor.submit(dump_system_logs, dump_dir, adb_shell),
+                    executor.submit(extract_system_files, dump_dir, adb_shell),
+                    executor.submit(dump_memory_info, dump_dir, adb_shell, package_index),
+                    executor.submit(dump_bluetooth_info, dump_dir, adb_shell),
+                    executor.submit(dump_input_devices, dump_dir, adb_shell),
+                    executor.submit(dump_services_info, dump_dir, adb_shell),
+                    executor.submit(dump_firmware_info, dump_dir, adb_shell, prop_map),
+                    executor.submit(dump_hardware_info, dump_dir, adb_shell),
+                    executor.submit(dump_security_info, dump_dir, adb_shell, prop_map),
+                ]
+                for future in futures:
+                    future.result()
+    finally:
+        # Finish the archive with a single fsync, even if a dump group failed
+        dump_writer.close()
     
     # Create a summary
-    create_summary(dump_dir)
+    create_summary(dump_dir, package_index)
     
     print(f"\nSystem dump completed! All data saved to: {dump_dir}")
     print("Review the 'summary.md' file for an overview of the dump.")
+    print(f"Text outputs are collected in {DUMP_ARCHIVE.name}; extract them with 'tar -xf {DUMP_ARCHIVE.name}'.")
 
 
 if __name__ == "__main__":
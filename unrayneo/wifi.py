@@ -3,16 +3,83 @@ Module for interacting with WiFi settings on RanNeo X2 AR glasses.
 """
 import subprocess
 import re
+import shlex
+import time
 import yaml
 from pathlib import Path
 
 import settings
 
+# libyaml's loader and dumper are much faster; fall back to the pure-Python
+# ones when PyYAML was built without it
+try:
+    from yaml import CSafeDumper as _YamlDumper, CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeDumper as _YamlDumper, SafeLoader as _YamlLoader
 
-def enable_wifi():
+# Seconds a `cmd wifi status` result is reused by get_current_wifi_connection
+WIFI_STATUS_TTL = 1.5
+
+# Last (time.monotonic(), connection) read by get_current_wifi_connection
+_wifi_status_cache = None
+
+# Config of the android-mcp-server checkout, updated with the device IP
+_MCP_CONFIG_PATH = Path(settings.MCP_CONFIG_PATH)
+
+# Fields of one `cmd wifi list-scan-results` line
+_BSSID_RE = re.compile(r'^\s*([0-9a-f:]+)')
+_FREQ_RE = re.compile(r'\s+(\d+)\s+')
+_RSSI_RE = re.compile(r'-\d+\(')
+_SSID_RE = re.compile(r'\s+([^\s].*?)\s+\[')
+_FLAGS_RE = re.compile(r'\[(.*)\]$')
+
+# One `SSID: `, `BSSID: ` or `IP: ` field of `cmd wifi status`. The WifiInfo
+# line lists them comma-separated, so a value ends at a comma or newline
+_STATUS_FIELD_RE = re.compile(r'\b(SSID|BSSID|IP): ([^,\n]*)')
+
+
+def _run_adb_shell(args, adb_shell=None):
+    """
+    Run a command on the device, through a persistent shell when one is given.
+    
+    Args:
+        args: The device command as a list of arguments, or a shell script
+              string to run as is.
+        adb_shell: Optional AdbShell session to run the command in instead of
+                   spawning a new adb client.
+        
+    Returns:
+        The completed process, with stdout and stderr as text.
+        
+    Raises:
+        subprocess.CalledProcessError: If the command fails.
+    """
+    # Quote the arguments once, so both paths hand the device the same
+    # command line; adb itself joins its arguments without quoting
+    command = args if isinstance(args, str) else shlex.join(args)
+    argv = ["adb", "shell", command]
+    
+    if adb_shell is None:
+        return subprocess.run(argv, check=True, capture_output=True, text=True)
+    
+    returncode, stdout, stderr = adb_shell.run(command)
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, argv, stdout, stderr)
+    return subprocess.CompletedProcess(argv, returncode, stdout, stderr)
+
+
+def enable_wifi(adb_shell=None, timeout=5.0, interval=0.25):
     """
     Enable WiFi on the RanNeo X2 AR glasses.
     
+    The radio takes a moment to come up, so the status is polled until it
+    reports WiFi as enabled or the timeout expires.
+    
+    Args:
+        adb_shell: Optional AdbShell session to run the commands in.
+        timeout: Maximum number of seconds to wait for WiFi to be enabled.
+        interval: Number of seconds between status polls.
+    
     Returns:
         True if WiFi was enabled successfully, False otherwise.
         
@@ -20,30 +87,38 @@ def enable_wifi():
         subprocess.CalledProcessError: If the ADB command fails.
     """
     try:
-        # Try multiple methods to enable WiFi
+        # Try multiple methods to enable WiFi; the device stops at the first
+        # one that succeeds
         methods = [
-            ["adb", "shell", "svc", "wifi", "enable"],
-            ["adb", "shell", "cmd", "wifi", "set-wifi-enabled", "enabled"],
-            ["adb", "shell", "settings", "put", "global", "wifi_on", "1"]
+            "svc wifi enable",
+            "cmd wifi set-wifi-enabled enabled",
+            "settings put global wifi_on 1"
         ]
         
-        for method in methods:
-            try:
-                subprocess.run(method, check=True, capture_output=True, text=True)
-                print(f"Attempted to enable WiFi using: {' '.join(method)}")
-            except subprocess.CalledProcessError:
-                continue
+        # Enable and read back the WiFi status in one shell script. The exit
+        # code is that of the enable methods; `cmd wifi status` is a fraction
+        # of `dumpsys wifi`.
+        script = f"{{ {' || '.join(methods)}; }} >/dev/null 2>&1; rc=$?; cmd wifi status; exit $rc"
+        try:
+            output = _run_adb_shell(script, adb_shell).stdout
+            print("Requested WiFi to be enabled")
+        except subprocess.CalledProcessError as e:
+            if not e.stdout:
+                # No state was read back, so adb itself failed
+                raise
+            output = e.stdout
+            print("Every method to enable WiFi failed")
         
-        # Check if WiFi is enabled
-        result = subprocess.run(
-            ["adb", "shell", "dumpsys", "wifi", "|", "grep", "mWifiState"],
-            check=True,
-            capture_output=True,
-            text=True,
-            shell=True
-        )
+        # The connection is about to change, so drop any cached status
+        _invalidate_wifi_status()
         
-        if "ENABLED_STATE" in result.stdout:
+        # Wait for WiFi to come up
+        deadline = time.monotonic() + timeout
+        while "Wifi is enabled" not in output and time.monotonic() < deadline:
+            time.sleep(interval)
+            output = _run_adb_shell(["cmd", "wifi", "status"], adb_shell).stdout
+        
+        if "Wifi is enabled" in output:
             print("WiFi is now enabled")
             return True
         else:
@@ -57,10 +132,13 @@ def enable_wifi():
         raise
 
 
-def trigger_wifi_scan():
+def trigger_wifi_scan(adb_shell=None):
     """
     Trigger a WiFi scan on the RanNeo X2 AR glasses.
     
+    Args:
+        adb_shell: Optional AdbShell session to run the command in.
+    
     Returns:
         True if the scan was triggered successfully, False otherwise.
         
@@ -68,12 +146,7 @@ def trigger_wifi_scan():
         subprocess.CalledProcessError: If the ADB command fails.
     """
     try:
-        subprocess.run(
-            ["adb", "shell", "cmd", "wifi", "start-scan"],
-            check=True,
-            capture_output=True,
-            text=True
-        )
+        _run_adb_shell(["cmd", "wifi", "start-scan"], adb_shell)
         
         print("WiFi scan triggered")
         return True
@@ -85,10 +158,165 @@ def trigger_wifi_scan():
         raise
 
 
-def list_wifi_networks():
+def start_wifi_scan():
+    """
+    Start a WiFi scan on the RanNeo X2 AR glasses without waiting for it.
+    
+    Other ADB work can run while the device scans; pass the returned scan
+    to wait_for_wifi_scan() to collect the results, or to stop_wifi_scan()
+    if they are no longer needed.
+    
+    Returns:
+        A tuple of the running `adb shell cmd wifi start-scan` process and the
+        time.monotonic() time the scan was started at.
+    """
+    started = time.monotonic()
+    process = subprocess.Popen(
+        ["adb", "shell", "cmd", "wifi", "start-scan"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    print("WiFi scan triggered")
+    return process, started
+
+
+def stop_wifi_scan(scan):
+    """
+    Reap the adb client of a scan started by start_wifi_scan().
+    
+    The client is killed if it is still running. Does nothing if it has
+    already exited.
+    
+    Args:
+        scan: The scan returned by start_wifi_scan().
+    """
+    process, _ = scan
+    if process.poll() is None:
+        process.kill()
+        process.communicate()
+
+
+def wait_for_wifi_scan(scan, timeout=10.0, interval=0.5, adb_shell=None):
+    """
+    Wait for a scan started by start_wifi_scan() and return its results.
+    
+    Scan results are polled until the device reports a network seen since the
+    scan was started, judged by the age of each result, or the timeout
+    expires, in which case the latest results are returned.
+    
+    Args:
+        scan: The scan returned by start_wifi_scan().
+        timeout: Maximum number of seconds to wait for scan results.
+        interval: Number of seconds between polls.
+        adb_shell: Optional AdbShell session to poll the results in.
+        
+    Returns:
+        A list of dictionaries containing WiFi network information.
+        
+    Raises:
+        subprocess.CalledProcessError: If the ADB command fails.
+    """
+    process, started = scan
+    try:
+        stdout, stderr = process.communicate()
+        if process.returncode != 0:
+            e = subprocess.CalledProcessError(process.returncode, process.args, stdout, stderr)
+            print(f"Error triggering WiFi scan: {e}")
+            print(f"Command output: {e.stdout}")
+            print(f"Command error: {e.stderr}")
+            raise e
+        
+        deadline = started + timeout
+        while True:
+            networks = list_wifi_networks(adb_shell)
+            # A result younger than the scan came from the scan
+            elapsed = time.monotonic() - started
+            if any(network['age'] is not None and network['age'] <= elapsed for network in networks):
+                return networks
+            if time.monotonic() >= deadline:
+                return networks
+            time.sleep(interval)
+    finally:
+        stop_wifi_scan(scan)
+
+
+def _parse_scan_result(line):
+    """
+    Parse one line of `cmd wifi list-scan-results`.
+    
+    The line is split on its whitespace columns (BSSID, frequency, RSSI, age,
+    then SSID and flags). Lines that do not fit that layout fall back to
+    matching each field with a regex.
+    
+    Args:
+        line: A non-empty line of scan results.
+        
+    Returns:
+        A dictionary with the network information, or None if the line has
+        no BSSID. The age is the number of seconds since the network was
+        seen, or None if it could not be read.
+    """
+    parts = line.split(None, 4)
+    if len(parts) == 5 and len(parts[0]) == 17 and parts[0].count(":") == 5 and parts[1].isdigit():
+        bssid, frequency, rssi, age, rest = parts
+        # Flags are the bracketed block at the end; the SSID may contain
+        # spaces or be empty
+        ssid, flags = rest, ""
+        if rest.endswith("]"):
+            ssid, _, flags = rest.rpartition(" ")
+        return {
+            'bssid': bssid,
+            'frequency': frequency,
+            'rssi': rssi,
+            'ssid': ssid.strip(),
+            'flags': flags[1:-1] if flags else 'Unknown',
+            'age': _parse_scan_age(age),
+        }
+    
+    # Extract network details using regex
+    bssid_match = _BSSID_RE.search(line)
+    if not bssid_match:
+        return None
+    freq_match = _FREQ_RE.search(line)
+    rssi_match = _RSSI_RE.search(line)
+    ssid_match = _SSID_RE.search(line)
+    flags_match = _FLAGS_RE.search(line)
+    
+    # Extract RSSI value
+    rssi = "Unknown"
+    if rssi_match:
+        rssi_start = rssi_match.start()
+        rssi_end = line.find(")", rssi_start)
+        if rssi_end > rssi_start:
+            rssi = line[rssi_start:rssi_end+1]
+    
+    return {
+        'bssid': bssid_match.group(1).strip(),
+        'frequency': freq_match.group(1).strip() if freq_match else 'Unknown',
+        'rssi': rssi,
+        # Some networks might have empty SSIDs
+        'ssid': ssid_match.group(1).strip() if ssid_match else "",
+        'flags': flags_match.group(1).strip() if flags_match else 'Unknown',
+        'age': None,
+    }
+
+
+def _parse_scan_age(age):
+    """Parse the Age(sec) column of a scan result, e.g. "2.345" or ">1000.0"."""
+    try:
+        return float(age.lstrip(">"))
+    except ValueError:
+        return None
+
+
+def list_wifi_networks(adb_shell=None):
     """
     List available WiFi networks using ADB.
     
+    Args:
+        adb_shell: Optional AdbShell session to run the command in.
+    
     Returns:
         A list of dictionaries containing WiFi network information.
     
@@ -97,12 +325,7 @@ def list_wifi_networks():
     """
     try:
         # Run the command to get WiFi scan results
-        result = subprocess.run(
-            ["adb", "shell", "cmd", "wifi", "list-scan-results"],
-            check=True,
-            capture_output=True,
-            text=True
-        )
+        result = _run_adb_shell(["cmd", "wifi", "list-scan-results"], adb_shell)
         
         # Parse the output
         networks = []
@@ -119,35 +342,9 @@ def list_wifi_networks():
         for line in lines[start_idx:]:
             if not line.strip():
                 continue
-                
-            # Extract network details using regex
-            bssid_match = re.search(r'^\s*([0-9a-f:]+)', line)
-            freq_match = re.search(r'\s+(\d+)\s+', line)
-            rssi_match = re.search(r'-\d+\(', line)
-            ssid_match = re.search(r'\s+([^\s].*?)\s+\[', line)
-            flags_match = re.search(r'\[(.*)\]$', line)
             
-            if bssid_match:
-                # Extract RSSI value
-                rssi = "Unknown"
-                if rssi_match:
-                    rssi_start = line.find(rssi_match.group(0))
-                    rssi_end = line.find(")", rssi_start)
-                    if rssi_end > rssi_start:
-                        rssi = line[rssi_start:rssi_end+1]
-                
-                # Extract SSID (some networks might have empty SSIDs)
-                ssid = ""
-                if ssid_match:
-                    ssid = ssid_match.group(1).strip()
-                
-                network = {
-                    'bssid': bssid_match.group(1).strip(),
-                    'frequency': freq_match.group(1).strip() if freq_match else 'Unknown',
-                    'rssi': rssi,
-                    'ssid': ssid,
-                    'flags': flags_match.group(1).strip() if flags_match else 'Unknown'
-                }
+            network = _parse_scan_result(line)
+            if network:
                 networks.append(network)
         
         return networks
@@ -159,13 +356,14 @@ def list_wifi_networks():
         raise
 
 
-def connect_to_wifi(ssid, password=None):
+def connect_to_wifi(ssid, password=None, adb_shell=None):
     """
     Connect to a WiFi network using ADB.
     
     Args:
         ssid: The SSID of the WiFi network to connect to.
         password: The password for the WiFi network. If None, assumes an open network.
+        adb_shell: Optional AdbShell session to run the command in.
         
     Returns:
         True if connection was successful, False otherwise.
@@ -176,20 +374,11 @@ def connect_to_wifi(ssid, password=None):
     try:
         if password:
             # Connect to a secured network
-            result = subprocess.run(
-                ["adb", "shell", "cmd", "wifi", "connect-network", ssid, "wpa2", password],
-                check=True,
-                capture_output=True,
-                text=True
-            )
+            result = _run_adb_shell(["cmd", "wifi", "connect-network", ssid, "wpa2", password], adb_shell)
         else:
             # Connect to an open network
-            result = subprocess.run(
-                ["adb", "shell", "cmd", "wifi", "connect-network", ssid, "open"],
-                check=True,
-                capture_output=True,
-                text=True
-            )
+            result = _run_adb_shell(["cmd", "wifi", "connect-network", ssid, "open"], adb_shell)
+        _invalidate_wifi_status()
         
         print(f"Attempting to connect to WiFi network: {ssid}")
         print(f"Command output: {result.stdout.strip()}")
@@ -207,10 +396,72 @@ def connect_to_wifi(ssid, password=None):
         raise
 
 
-def get_current_wifi_connection():
+def _parse_wifi_status(output):
+    """
+    Parse the output of `cmd wifi status`.
+    
+    Args:
+        output: The stripped command output.
+        
+    Returns:
+        A dictionary containing information about the current WiFi connection,
+        or None if not connected.
+    """
+    # Check if connected
+    if "Wifi is disabled" in output or "Not connected" in output:
+        return None
+        
+    # Extract connection details in one pass, keeping the first value of each
+    fields = {}
+    for match in _STATUS_FIELD_RE.finditer(output):
+        fields.setdefault(match.group(1), match.group(2).strip())
+    
+    if 'SSID' in fields:
+        connection = {
+            'ssid': fields['SSID'],
+            'bssid': fields.get('BSSID', 'Unknown'),
+            # InetAddress prints the IP as `/1.2.3.4`
+            'ip': fields.get('IP', 'Unknown').lstrip('/') or 'Unknown'
+        }
+        return connection
+    
+    return None
+
+
+def _cache_wifi_status(output):
+    """
+    Parse `cmd wifi status` output and keep it for get_current_wifi_connection.
+    
+    Args:
+        output: The command output.
+        
+    Returns:
+        The parsed connection, see _parse_wifi_status.
+    """
+    global _wifi_status_cache
+    connection = _parse_wifi_status(output.strip())
+    _wifi_status_cache = (time.monotonic(), connection)
+    return connection
+
+
+def _invalidate_wifi_status():
+    """Drop the cached connection after a command that may have changed it."""
+    global _wifi_status_cache
+    _wifi_status_cache = None
+
+
+def get_current_wifi_connection(adb_shell=None, max_age=WIFI_STATUS_TTL):
     """
     Get information about the current WiFi connection.
     
+    A result fetched less than max_age seconds ago is returned without asking
+    the device again. Enabling WiFi or connecting to a network drops it.
+    
+    Args:
+        adb_shell: Optional AdbShell session to run the command in.
+        max_age: Maximum age in seconds of a cached result to reuse; pass 0
+                 to always query the device, e.g. when polling for a change.
+    
     Returns:
         A dictionary containing information about the current WiFi connection,
         or None if not connected.
@@ -218,42 +469,19 @@ def get_current_wifi_connection():
     Raises:
         subprocess.CalledProcessError: If the ADB command fails.
     """
+    if _wifi_status_cache is not None and time.monotonic() - _wifi_status_cache[0] < max_age:
+        return _wifi_status_cache[1]
+    
     try:
         # Run the command to get current WiFi connection
-        result = subprocess.run(
-            ["adb", "shell", "cmd", "wifi", "status"],
-            check=True,
-            capture_output=True,
-            text=True
-        )
-        
-        # Parse the output
-        output = result.stdout.strip()
-        
-        # Check if connected
-        if "Wifi is disabled" in output or "Not connected" in output:
-            return None
-            
-        # Extract connection details
-        ssid_match = re.search(r'SSID: (.*?)($|\n)', output)
-        bssid_match = re.search(r'BSSID: (.*?)($|\n)', output)
-        ip_match = re.search(r'IP: (.*?)($|\n)', output)
-        
-        if ssid_match:
-            connection = {
-                'ssid': ssid_match.group(1).strip(),
-                'bssid': bssid_match.group(1).strip() if bssid_match else 'Unknown',
-                'ip': ip_match.group(1).strip() if ip_match else 'Unknown'
-            }
-            return connection
-        
-        return None
-        
+        result = _run_adb_shell(["cmd", "wifi", "status"], adb_shell)
     except subprocess.CalledProcessError as e:
         print(f"Error getting current WiFi connection: {e}")
         print(f"Command output: {e.stdout}")
         print(f"Command error: {e.stderr}")
         raise
+    
+    return _cache_wifi_status(result.stdout)
 
 
 def update_mcp_config(ip_address=None):
@@ -277,12 +505,14 @@ def update_mcp_config(ip_address=None):
                 
             ip_address = connection['ip']
         
-        # Path to MCP config file
-        config_path = Path("/home/user/projects/UnRayNeo/android-mcp-server/config.yaml")
-        
         # Read the current config
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        with _MCP_CONFIG_PATH.open('r') as f:
+            config = yaml.load(f, Loader=_YamlLoader)
+        
+        # Nothing to write when the config already has this IP
+        if (config.get('device') or {}).get('name') == ip_address:
+            print(f"MCP config already uses device IP: {ip_address}")
+            return True
         
         # Update the device name (IP address)
         if 'device' not in config:
@@ -291,8 +521,8 @@ def update_mcp_config(ip_address=None):
         config['device']['name'] = ip_address
         
         # Write the updated config
-        with open(config_path, 'w') as f:
-            yaml.dump(config, f, default_flow_style=False)
+        with _MCP_CONFIG_PATH.open('w') as f:
+            yaml.dump(config, f, Dumper=_YamlDumper, default_flow_style=False)
             
         print(f"Updated MCP config with device IP: {ip_address}")
         return True